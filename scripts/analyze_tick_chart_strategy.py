@@ -19,13 +19,13 @@ tick_chartフォルダ内の歩み値データからエントリー・イグジ
 
 import os
 import sys
-import csv
 import argparse
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
 import pandas as pd
 import numpy as np
+from tick_csv import read_tick_header, resolve_tick_columns, read_tick_columns
 
 # matplotlibはオプション（グラフ作成時のみ必要）
 try:
@@ -39,48 +39,6 @@ except ImportError:
     MATPLOTLIB_AVAILABLE = False
 
 
-def parse_price(price_str: str) -> Optional[float]:
-    """
-    価格文字列を数値に変換（カンマ区切り対応）
-    
-    Args:
-        price_str: 価格文字列（例: "3,460"）
-        
-    Returns:
-        float: 価格の数値、変換失敗時はNone
-    """
-    if not price_str or price_str == "":
-        return None
-    
-    try:
-        # カンマとダブルクォートを除去
-        cleaned = price_str.replace(",", "").replace('"', "").strip()
-        return float(cleaned)
-    except (ValueError, AttributeError):
-        return None
-
-
-def parse_volume(volume_str: str) -> Optional[int]:
-    """
-    出来高文字列を数値に変換（カンマ区切り対応）
-    
-    Args:
-        volume_str: 出来高文字列（例: "100" または "1,300"）
-        
-    Returns:
-        int: 出来高の数値、変換失敗時はNone
-    """
-    if not volume_str or volume_str == "":
-        return None
-    
-    try:
-        # カンマとダブルクォートを除去
-        cleaned = volume_str.replace(",", "").replace('"', "").strip()
-        return int(cleaned)
-    except (ValueError, AttributeError):
-        return None
-
-
 def load_tick_data(csv_path: Path) -> Optional[pd.DataFrame]:
     """
     tick_chartのCSVファイルを読み込んでDataFrameに変換
@@ -92,68 +50,48 @@ def load_tick_data(csv_path: Path) -> Optional[pd.DataFrame]:
         pd.DataFrame: 読み込んだデータ、失敗時はNone
     """
     try:
-        data = []
+        # ヘッダー行のみを読み込んで列名を特定
+        time_col, price_col, volume_col = resolve_tick_columns(read_tick_header(csv_path))
+        if time_col is None or price_col is None or volume_col is None:
+            print(f"  警告: 必要な列が見つかりません。スキップします。")
+            return None
         
-        with open(csv_path, 'r', encoding='utf-8-sig') as f:
-            reader = csv.reader(f)
-            header = next(reader)  # ヘッダー行をスキップ
-            
-            # 時間列のインデックスを取得
-            time_col_idx = None
-            price_col_idx = None
-            volume_col_idx = None
-            
-            for idx, col in enumerate(header):
-                if '時間' in col:
-                    time_col_idx = idx
-                elif '約定値' in col or '約定' in col:
-                    price_col_idx = idx
-                elif '出来高' in col:
-                    volume_col_idx = idx
-            
-            if time_col_idx is None or price_col_idx is None or volume_col_idx is None:
-                print(f"  警告: 必要な列が見つかりません。スキップします。")
-                return None
-            
-            # データ行を処理
-            for row in reader:
-                if len(row) <= max(time_col_idx, price_col_idx, volume_col_idx):
-                    continue
-                
-                time_str = row[time_col_idx].strip()
-                price_str = row[price_col_idx].strip()
-                volume_str = row[volume_col_idx].strip()
-                
-                # 時間をパース
-                try:
-                    time_obj = datetime.strptime(time_str, "%H:%M:%S").time()
-                    # 9時〜10時のデータのみを抽出
-                    if 9 <= time_obj.hour < 10:
-                        price = parse_price(price_str)
-                        volume = parse_volume(volume_str)
-                        
-                        if price is not None and volume is not None:
-                            # 日時を結合（日付はファイル名から取得）
-                            date_str = csv_path.stem.split('_')[-1]  # 例: "20251203"
-                            if len(date_str) == 8:
-                                date_obj = datetime.strptime(date_str, "%Y%m%d").date()
-                                datetime_obj = datetime.combine(date_obj, time_obj)
-                                
-                                data.append({
-                                    'datetime': datetime_obj,
-                                    'time': time_obj,
-                                    'price': price,
-                                    'volume': volume
-                                })
-                except ValueError:
-                    continue
+        # 日付はファイル名から取得（例: "xxxx_20251203" → "20251203"）
+        date_str = csv_path.stem.split('_')[-1]
+        if len(date_str) != 8:
+            return None
+        try:
+            date = pd.Timestamp(datetime.strptime(date_str, "%Y%m%d"))
+        except ValueError:
+            return None
+        
+        # 必要な3列のみを一括パース（カンマ区切りの数値にも対応、数値にできない値はNaNにして後で除去）
+        df = read_tick_columns(csv_path, time_col, price_col, volume_col)
+        
+        # 時間をまとめてパース（不正な形式はNaTにして後で除去）
+        times = pd.to_datetime(df[time_col].str.strip(), format="%H:%M:%S", errors='coerce')
         
-        if not data:
+        # 9時〜10時のデータのみを抽出
+        valid = (
+            (times.dt.hour >= 9) & (times.dt.hour < 10) &
+            df[price_col].notna() & df[volume_col].notna()
+        ).to_numpy(dtype=bool)
+        if not valid.any():
             return None
         
-        df = pd.DataFrame(data)
-        df = df.sort_values('datetime')
-        df = df.reset_index(drop=True)
+        times = times[valid]
+        # CSVファイルは時系列で逆順のため、行を反転して時系列順にする
+        # （同じ時刻のデータも正しい順序（時系列順）になる）
+        df = pd.DataFrame({
+            'datetime': (date + (times - times.dt.normalize())).to_numpy()[::-1],
+            'time': times.dt.time.to_numpy()[::-1],
+            'price': df[price_col].to_numpy(dtype=np.float64)[valid][::-1],
+            'volume': df[volume_col].to_numpy(dtype=np.float64)[valid].astype(np.int64)[::-1]
+        })
+        # 反転しただけで時系列順になっていない場合のみ、同じ時刻の順序を保つ安定ソートで並べ替える
+        if not df['datetime'].is_monotonic_increasing:
+            df = df.sort_values('datetime', kind='stable')
+            df = df.reset_index(drop=True)
         
         return df
         
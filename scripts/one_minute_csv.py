@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+1分足データCSVファイルの読み込みライブラリ
+
+test_33_analysis_one_minute.py などpandasで1分足データを扱うスクリプトで使用する
+
+環境変数 KABU_CACHE_PARQUET=1 を指定すると、初回読み込み時にCSVと同じ場所へ
+Parquetファイル（拡張子 .parquet）を保存し、以降はCSVより新しい限りそちらから読み込む
+"""
+
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Optional
+import pandas as pd
+
+# pyarrowはオプション（インストールされていればCSVのパースをマルチスレッドで行う）
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# UTF-8のBOM
+UTF8_BOM = b'\xef\xbb\xbf'
+
+# ファイルパスごとに判定済みのエンコーディングをキャッシュ
+_encoding_cache: Dict[str, str] = {}
+
+
+def parquet_cache_enabled() -> bool:
+    """
+    Parquetキャッシュが有効かどうかを返す
+    
+    Returns:
+        bool: 環境変数 KABU_CACHE_PARQUET が "1" の場合True（pyarrowが必要）
+    """
+    return PYARROW_AVAILABLE and os.environ.get('KABU_CACHE_PARQUET') == '1'
+
+
+def detect_encoding(csv_path: Path) -> str:
+    """
+    CSVファイルの先頭3バイトからBOMの有無を判定し、読み込みに使うエンコーディングを返す
+    
+    BOMがない場合は'utf-8'を返し、BOM除去のための処理を省く
+    
+    Args:
+        csv_path: CSVファイルのパス
+        
+    Returns:
+        str: BOMありの場合は'utf-8-sig'、なしの場合は'utf-8'
+    """
+    key = str(csv_path)
+    encoding = _encoding_cache.get(key)
+    if encoding is None:
+        with open(csv_path, 'rb') as f:
+            encoding = 'utf-8-sig' if f.read(len(UTF8_BOM)) == UTF8_BOM else 'utf-8'
+        _encoding_cache[key] = encoding
+    return encoding
+
+
+def read_one_minute_csv(csv_path: Path, usecols, dtype: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """
+    1分足データCSVファイルから指定された列のみを読み込む
+    
+    pyarrowが利用可能な場合はpyarrowのマルチスレッドCSVリーダーで列指向のまま読み込み、
+    利用できない場合はpandasのCエンジンで読み込む
+    
+    Args:
+        csv_path: 1分足データCSVファイルのパス
+        usecols: 読み込む列名の集合（CSVに存在しない列は無視する）
+        dtype: 列名とデータ型の辞書（省略時は型を推論）
+    
+    Returns:
+        pd.DataFrame: 読み込んだデータ
+    """
+    if not PYARROW_AVAILABLE:
+        return pd.read_csv(
+            csv_path,
+            encoding=detect_encoding(csv_path),
+            engine='c',
+            usecols=lambda col: col in usecols,
+            dtype=dtype
+        )
+    
+    if parquet_cache_enabled():
+        return _read_with_parquet_cache(Path(csv_path), usecols, dtype)
+    
+    # pyarrowは存在しない列を指定するとエラーになるため、ヘッダーにある列だけを指定する
+    header = pd.read_csv(csv_path, encoding=detect_encoding(csv_path), nrows=0).columns
+    columns = [col for col in header if col in usecols]
+    return _read_csv_table(csv_path, columns, dtype).to_pandas()
+
+
+def _read_csv_table(csv_path: Path, columns: Optional[list], dtype: Optional[Dict[str, str]]) -> 'pa.Table':
+    """
+    pyarrowのCSVリーダーでCSVファイルを読み込む
+    
+    Args:
+        csv_path: CSVファイルのパス
+        columns: 読み込む列名のリスト（Noneの場合は全列）
+        dtype: 列名とデータ型の辞書（省略時は型を推論）
+    
+    Returns:
+        pa.Table: 読み込んだテーブル
+    """
+    # 型を明示した列は推論させない（時刻列が時刻型に推論されるのを防ぐ）
+    column_types = {col: pa.type_for_alias(col_type) for col, col_type in (dtype or {}).items()}
+    convert_options = pacsv.ConvertOptions(column_types=column_types)
+    if columns is not None:
+        convert_options.include_columns = columns
+    return pacsv.read_csv(csv_path, convert_options=convert_options)
+
+
+def _read_with_parquet_cache(csv_path: Path, usecols, dtype: Optional[Dict[str, str]]) -> pd.DataFrame:
+    """
+    Parquetキャッシュを経由してCSVファイルを読み込む
+    
+    キャッシュがCSVより新しければキャッシュから必要な列だけを読み込み、
+    なければCSVの全列を読み込んでキャッシュを作成する
+    
+    Args:
+        csv_path: CSVファイルのパス
+        usecols: 読み込む列名の集合（CSVに存在しない列は無視する）
+        dtype: 列名とデータ型の辞書（省略時は型を推論）
+    
+    Returns:
+        pd.DataFrame: 読み込んだデータ
+    """
+    pq_path = csv_path.with_suffix('.parquet')
+    
+    if pq_path.exists() and pq_path.stat().st_mtime >= csv_path.stat().st_mtime:
+        schema = pq.read_schema(pq_path)
+        columns = [col for col in schema.names if col in usecols]
+        table = pq.read_table(pq_path, columns=columns)
+        # キャッシュ作成時と型指定が異なる列は読み込み後に変換する
+        casts = {col: pa.type_for_alias(col_type) for col, col_type in (dtype or {}).items()
+                 if col in columns and table.schema.field(col).type != pa.type_for_alias(col_type)}
+        if casts:
+            table = table.cast(pa.schema([
+                pa.field(field.name, casts.get(field.name, field.type)) for field in table.schema
+            ]))
+        return table.to_pandas()
+    
+    # キャッシュは他のスクリプトからも使えるように全列を保存する
+    table = _read_csv_table(csv_path, None, dtype)
+    try:
+        pq.write_table(table, pq_path, compression='zstd')
+    except OSError as e:
+        print(f"警告: Parquetキャッシュの保存に失敗しました: {pq_path} - {e}", file=sys.stderr)
+    
+    columns = [col for col in table.column_names if col in usecols]
+    return table.select(columns).to_pandas()
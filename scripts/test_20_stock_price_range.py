@@ -214,9 +214,13 @@ def filter_stocks_by_price_range(client, stock_list_df, price_df, min_price: flo
         )
     
     # 各銘柄の最新日の終値を取得
-    # 日付でソートして、各銘柄の最新データを取得
-    price_df_sorted = price_df.sort_values(['Code', 'Date'], ascending=[True, False])
-    latest_prices = price_df_sorted.groupby('Code').first().reset_index()
+    if price_df['Date'].nunique() <= 1:
+        # 1日分のデータは銘柄ごとに1行のためそのまま使う
+        latest_prices = price_df
+    else:
+        # 銘柄ごとに日付が最大の行を選ぶ（全体をソートせずに各グループの最大位置だけを求める）
+        latest_idx = price_df.groupby('Code', sort=False, observed=True)['Date'].idxmax()
+        latest_prices = price_df.loc[latest_idx].reset_index(drop=True)
     
     print(f"最新日のデータがある銘柄数: {len(latest_prices)} 件")
     
@@ -240,14 +244,15 @@ def filter_stocks_by_price_range(client, stock_list_df, price_df, min_price: flo
             (merged_df['Close'] <= max_price)
         ]
         
-        # 結果をリスト形式に変換
-        for _, row in filtered_df.iterrows():
+        # 結果をリスト形式に変換（行をSeriesにせず、必要な列の値をタプルで受け取る）
+        result_columns = ['Code', 'CompanyName', 'Close', 'MarketCodeName', 'Sector17CodeName']
+        for code, company_name, close, market, sector in filtered_df[result_columns].itertuples(index=False, name=None):
             results.append({
-                'code': str(row['Code']),
-                'company_name': row.get('CompanyName', 'N/A'),
-                'price': float(row['Close']),
-                'market': row.get('MarketCodeName', 'N/A'),
-                'sector': row.get('Sector17CodeName', 'N/A')
+                'code': str(code),
+                'company_name': company_name,
+                'price': float(close),
+                'market': market,
+                'sector': sector
             })
     
     print(f"該当銘柄数: {len(results)} 件")
@@ -20,58 +20,96 @@ tick_chartフォルダ内の歩み値データから1分足データを作成す
 
 import os
 import sys
-import csv
 import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime, time, timedelta
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 import pandas as pd
 import numpy as np
+from tick_csv import read_tick_header, resolve_tick_columns, read_tick_columns
 
+# pyarrowはオプション（インストールされていれば1分足のCSVをpyarrowのCSVライターで書き出す）
+# （歩み値CSVの読み込みでのpyarrowの使用はtick_csvで判定する）
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
 
-def parse_price(price_str: str) -> Optional[float]:
-    """
-    価格文字列を数値に変換（カンマ区切り対応）
-    
-    Args:
-        price_str: 価格文字列（例: "3,460"）
-        
-    Returns:
-        float: 価格の数値、変換失敗時はNone
-    """
-    if not price_str or price_str == "":
-        return None
-    
+# CSVライターのquoting_header（ヘッダー行のクォート指定）は古いpyarrow（18以前）にはないため、
+# 指定できない場合はpyarrowでは書き出さずにpandasで書き出す
+PYARROW_CSV_QUOTING_HEADER = False
+if PYARROW_AVAILABLE:
     try:
-        # カンマとダブルクォートを除去
-        cleaned = price_str.replace(",", "").replace('"', "").strip()
-        return float(cleaned)
-    except (ValueError, AttributeError):
-        return None
+        pacsv.WriteOptions(quoting_header='none')
+        PYARROW_CSV_QUOTING_HEADER = True
+    except TypeError:
+        pass
+
+# 1日のナノ秒数
+NS_PER_DAY = 24 * 60 * 60 * 1_000_000_000
 
+# numbaはオプション（インストールされていれば1分足の集約をJITコンパイルしたループで行う）
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
-def parse_volume(volume_str: str) -> Optional[int]:
+    def njit(*args, **kwargs):
+        """numbaがない場合は関数をそのまま返す"""
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+# cache=Trueでコンパイル結果を__pycache__に保存し、2回目以降の実行でJITコンパイルを省略する
+# （安値・高値の初期化判定にNaNを使うため、NaNを仮定しないfastmathは指定しない）
+@njit(cache=True)
+def agg_minute(buckets: np.ndarray, price: np.ndarray, volume: np.ndarray, n_buckets: int):
     """
-    出来高文字列を数値に変換（カンマ区切り対応）
+    時系列順にソート済みの歩み値を1分単位のバケットごとに1回の走査で集約
     
     Args:
-        volume_str: 出来高文字列（例: "100" または "1,300"）
+        buckets: 各歩み値の1分足バケット番号（0始まり、昇順）
+        price: 各歩み値の価格
+        volume: 各歩み値の出来高
+        n_buckets: バケット数
         
     Returns:
-        int: 出来高の数値、変換失敗時はNone
+        tuple: (始値, 高値, 安値, 終値, 出来高の合計, 価格×出来高の合計) の配列
+               歩み値がないバケットの始値〜終値はNaN
     """
-    if not volume_str or volume_str == "":
-        return None
-    
-    try:
-        # カンマとダブルクォートを除去
-        cleaned = volume_str.replace(",", "").replace('"', "").strip()
-        return int(cleaned)
-    except (ValueError, AttributeError):
-        return None
+    first = np.full(n_buckets, np.nan)
+    high = np.full(n_buckets, np.nan)
+    low = np.full(n_buckets, np.nan)
+    last = np.full(n_buckets, np.nan)
+    vol_sum = np.zeros(n_buckets, dtype=np.int64)
+    pv_sum = np.zeros(n_buckets)
+    
+    for i in range(len(buckets)):
+        b = buckets[i]
+        p = price[i]
+        if np.isnan(first[b]):
+            first[b] = p
+            high[b] = p
+            low[b] = p
+        else:
+            if p > high[b]:
+                high[b] = p
+            if p < low[b]:
+                low[b] = p
+        last[b] = p
+        vol_sum[b] += volume[i]
+        pv_sum[b] += p * volume[i]
+    
+    return first, high, low, last, vol_sum, pv_sum
 
 
-def load_tick_data(csv_path: Path, start_time: Optional[time] = None, end_time: Optional[time] = None) -> Optional[pd.DataFrame]:
+def load_tick_data(csv_path: Path, start_time: Optional[time] = None, end_time: Optional[time] = None,
+                   messages: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
     """
     tick_chartのCSVファイルを読み込んでDataFrameに変換
     
@@ -79,107 +117,133 @@ def load_tick_data(csv_path: Path, start_time: Optional[time] = None, end_time:
         csv_path: CSVファイルのパス
         start_time: 開始時刻（Noneの場合は全時間帯）
         end_time: 終了時刻（Noneの場合は全時間帯）
+        messages: 警告・エラーメッセージの追加先（Noneの場合はその場で出力する）
         
     Returns:
         pd.DataFrame: 読み込んだデータ、失敗時はNone
     """
+    log = messages.append if messages is not None else print
     try:
-        data = []
+        # ヘッダー行のみを読み込んで列名を特定
+        time_col, price_col, volume_col = resolve_tick_columns(read_tick_header(csv_path))
+        if time_col is None or price_col is None or volume_col is None:
+            log(f"  警告: 必要な列が見つかりません。スキップします。")
+            return None
         
-        with open(csv_path, 'r', encoding='utf-8-sig') as f:
-            reader = csv.reader(f)
-            header = next(reader)  # ヘッダー行をスキップ
-            
-            # 時間列のインデックスを取得
-            time_col_idx = None
-            price_col_idx = None
-            volume_col_idx = None
-            
-            for idx, col in enumerate(header):
-                if '時間' in col:
-                    time_col_idx = idx
-                elif '約定値' in col or '約定' in col:
-                    price_col_idx = idx
-                elif '出来高' in col:
-                    volume_col_idx = idx
-            
-            if time_col_idx is None or price_col_idx is None or volume_col_idx is None:
-                print(f"  警告: 必要な列が見つかりません。スキップします。")
-                return None
-            
-            # データ行を処理（行番号を追加して、同じ時刻のデータも正しい順序でソートできるようにする）
-            row_num = 0
-            for row in reader:
-                if len(row) <= max(time_col_idx, price_col_idx, volume_col_idx):
-                    continue
-                
-                time_str = row[time_col_idx].strip()
-                price_str = row[price_col_idx].strip()
-                volume_str = row[volume_col_idx].strip()
-                
-                # 時間をパース
-                try:
-                    time_obj = datetime.strptime(time_str, "%H:%M:%S").time()
-                    
-                    # 時間範囲のフィルタリング
-                    should_include = True
-                    if start_time is not None or end_time is not None:
-                        should_include = False
-                        if start_time is not None and end_time is not None:
-                            # 開始時刻と終了時刻が指定されている場合
-                            if start_time <= end_time:
-                                # 通常の範囲（例: 09:00-15:00）
-                                should_include = start_time <= time_obj <= end_time
-                            else:
-                                # 日をまたぐ範囲（例: 22:00-02:00）
-                                should_include = time_obj >= start_time or time_obj <= end_time
-                        elif start_time is not None:
-                            # 開始時刻のみ指定
-                            should_include = time_obj >= start_time
-                        elif end_time is not None:
-                            # 終了時刻のみ指定
-                            should_include = time_obj <= end_time
-                    
-                    if should_include:
-                        price = parse_price(price_str)
-                        volume = parse_volume(volume_str)
-                        
-                        if price is not None and volume is not None:
-                            # 日時を結合（日付はファイル名から取得）
-                            date_str = csv_path.stem.split('_')[-1]  # 例: "20251203"
-                            if len(date_str) == 8:
-                                date_obj = datetime.strptime(date_str, "%Y%m%d").date()
-                                datetime_obj = datetime.combine(date_obj, time_obj)
-                                
-                                data.append({
-                                    'datetime': datetime_obj,
-                                    'time': time_obj,
-                                    'price': price,
-                                    'volume': volume,
-                                    'row_num': row_num  # 行番号を追加（CSVファイルが時系列で逆順のため、同じ時刻のデータも正しい順序でソートするため）
-                                })
-                                row_num += 1
-                except ValueError:
-                    continue
+        # 日付はファイル名から取得（例: "xxxx_20251203" → "20251203"）
+        date_str = csv_path.stem.split('_')[-1]
+        if len(date_str) != 8:
+            return None
+        try:
+            # ファイル内で共通の日付は1回だけパースし、0時時点のナノ秒（int64）として保持
+            base_ns = np.datetime64(datetime.strptime(date_str, "%Y%m%d"), 'ns').astype(np.int64)
+        except ValueError:
+            return None
+        
+        # 必要な3列のみを一括パース（カンマ区切りの数値にも対応）
+        df = read_tick_columns(csv_path, time_col, price_col, volume_col)
+        
+        # 時間をまとめてパース（不正な形式はNaTにして後で除去）
+        times = pd.to_datetime(df[time_col].str.strip(), format="%H:%M:%S", errors='coerce')
+        mask = times.notna().to_numpy(dtype=bool, copy=True)
+        # 0時からの経過ナノ秒（NaTの行はmaskで除外されるため値は使われない）
+        time_of_day_ns = times.to_numpy(dtype='datetime64[ns]').view(np.int64) % NS_PER_DAY
+        
+        # 時間範囲のフィルタリング
+        start_ns = _time_to_ns(start_time) if start_time is not None else None
+        end_ns = _time_to_ns(end_time) if end_time is not None else None
+        if start_ns is not None and end_ns is not None:
+            if start_ns <= end_ns:
+                # 通常の範囲（例: 09:00-15:00）
+                mask &= (time_of_day_ns >= start_ns) & (time_of_day_ns <= end_ns)
+            else:
+                # 日をまたぐ範囲（例: 22:00-02:00）
+                mask &= (time_of_day_ns >= start_ns) | (time_of_day_ns <= end_ns)
+        elif start_ns is not None:
+            # 開始時刻のみ指定
+            mask &= time_of_day_ns >= start_ns
+        elif end_ns is not None:
+            # 終了時刻のみ指定
+            mask &= time_of_day_ns <= end_ns
         
-        if not data:
+        # 列ごとの配列（SoA）のまま有効行を抽出し、最後に1回だけDataFrameを構築する
+        price = df[price_col].to_numpy(dtype=np.float64)
+        volume = df[volume_col].to_numpy(dtype=np.float64)
+        valid = mask & ~np.isnan(price) & ~np.isnan(volume)
+        if not valid.any():
             return None
         
-        df = pd.DataFrame(data)
-        # datetimeとrow_numでソート（CSVファイルが時系列で逆順のため、row_numを逆順にしてからソート）
+        # 日時は日付のナノ秒に経過ナノ秒を足すだけで求める
+        dt = (base_ns + time_of_day_ns[valid]).view('datetime64[ns]')
+        price = price[valid]
+        volume = volume[valid].astype(np.int64)
+        
+        # datetimeでソート（CSVファイルが時系列で逆順のため、先に行を反転してから安定ソートする）
         # これにより、同じ時刻のデータも正しい順序（時系列順）になる
-        df['sort_key'] = df['row_num'] * -1  # 行番号を逆順にする（CSVファイルが時系列で逆順のため）
-        df = df.sort_values(['datetime', 'sort_key'])
-        df = df.drop(['row_num', 'sort_key'], axis=1)
-        df = df.reset_index(drop=True)
+        dt, price, volume = dt[::-1], price[::-1], volume[::-1]
+        if not np.all(dt[1:] >= dt[:-1]):
+            # 反転しただけで時系列順になっていない場合のみソートする
+            order = np.argsort(dt, kind='stable')
+            dt, price, volume = dt[order], price[order], volume[order]
+        
+        # 配列はこの関数内で新たに確保したものなので、DataFrameへはコピーせずに渡す
+        df = pd.DataFrame({
+            'datetime': dt,
+            'price': price,
+            'volume': volume
+        }, copy=False)
         
         return df
         
     except Exception as e:
-        print(f"  エラー: ファイル読み込み中にエラーが発生しました: {e}")
+        log(f"  エラー: ファイル読み込み中にエラーが発生しました: {e}")
         return None
 
 
+def _time_to_ns(t: time) -> int:
+    """
+    timeオブジェクトを0時からの経過ナノ秒に変換
+    
+    Args:
+        t: timeオブジェクト
+        
+    Returns:
+        int: 0時からの経過ナノ秒
+    """
+    seconds = t.hour * 3600 + t.minute * 60 + t.second
+    return seconds * 1_000_000_000 + t.microsecond * 1_000
+
+
+def to_flag(condition: np.ndarray) -> pd.Categorical:
+    """
+    真偽値の配列を"◯"/"✕"のカテゴリ型に変換（文字列オブジェクトを行数分作らない）
+    
+    Args:
+        condition: 真偽値の配列
+        
+    Returns:
+        pd.Categorical: Trueは"◯"、Falseは"✕"
+    """
+    return pd.Categorical.from_codes(condition.astype(np.int8), categories=["✕", "◯"])
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    累積和の差分で移動平均を計算（rolling(window, min_periods=1).mean()と同じ結果）
+    
+    Args:
+        values: 値の配列
+        window: 期間
+        
+    Returns:
+        np.ndarray: 移動平均（先頭のwindow未満の行はそれまでの行の平均）
+    """
+    cumsum = np.concatenate(([0.0], np.cumsum(values)))
+    end = np.arange(1, len(values) + 1)
+    start = np.maximum(end - window, 0)
+    return (cumsum[end] - cumsum[start]) / (end - start)
+
+
 def create_one_minute_chart(df: pd.DataFrame) -> pd.DataFrame:
     """
     歩み値データから1分足データを作成
@@ -193,40 +257,45 @@ def create_one_minute_chart(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         return pd.DataFrame()
     
-    # datetimeをインデックスに設定
-    df_indexed = df.set_index('datetime')
+    # 価格×出来高を計算し、datetimeをインデックスに設定
+    df_indexed = df.assign(pv=df['price'] * df['volume']).set_index('datetime')
     
     # 1分単位でリサンプリング（個別に集約）
     resampled = df_indexed.resample('1min')
     
-    # 各集約値を計算
-    one_minute_data = pd.DataFrame({
-        '始値': resampled['price'].first(),  # 最初の価格
-        '高値': resampled['price'].max(),    # 最高価格
-        '安値': resampled['price'].min(),    # 最低価格
-        '終値': resampled['price'].last(),   # 最後の価格
-        '出来高': resampled['volume'].sum()  # 出来高の合計
-    })
+    if NUMBA_AVAILABLE:
+        # 各集約値をJITコンパイルしたカーネルで1回の走査でまとめて計算（dfは時系列順にソート済み）
+        minutes = df['datetime'].to_numpy().astype('datetime64[m]').view(np.int64)
+        buckets = minutes - minutes[0]
+        n_buckets = int(buckets[-1]) + 1
+        first, high, low, last, vol_sum, pv_sum = agg_minute(
+            buckets,
+            df['price'].to_numpy(dtype=np.float64),
+            df['volume'].to_numpy(dtype=np.int64),
+            n_buckets
+        )
+        minute_index = pd.date_range(df['datetime'].iloc[0].floor('min'), periods=n_buckets, freq='min', name='datetime')
+        one_minute_data = pd.DataFrame({
+            '始値': first,
+            '高値': high,
+            '安値': low,
+            '終値': last,
+            '出来高': vol_sum,
+            'pv_sum': pv_sum
+        }, index=minute_index)
+    else:
+        # 各集約値を1回のagg呼び出しでまとめて計算
+        one_minute_data = resampled.agg(
+            始値=('price', 'first'),   # 最初の価格
+            高値=('price', 'max'),     # 最高価格
+            安値=('price', 'min'),     # 最低価格
+            終値=('price', 'last'),    # 最後の価格
+            出来高=('volume', 'sum'),  # 出来高の合計
+            pv_sum=('pv', 'sum')      # 価格×出来高の合計
+        )
     
     # 各1分間のVWAPを計算（その1分間の価格×出来高の合計 / 出来高の合計）
-    def calculate_minute_vwap(group):
-        """各1分間のVWAPを計算"""
-        if group.empty:
-            return np.nan
-        price_volume_sum = (group['price'] * group['volume']).sum()
-        volume_sum = group['volume'].sum()
-        if volume_sum == 0:
-            return np.nan
-        return price_volume_sum / volume_sum
-    
-    # resampledの各グループに対してVWAPを計算し、インデックスを保持
-    minute_vwap_dict = {}
-    for name, group in resampled:
-        vwap = calculate_minute_vwap(group)
-        minute_vwap_dict[name] = vwap
-    
-    # one_minute_dataのインデックスに対応するVWAPを取得
-    one_minute_data['分VWAP'] = one_minute_data.index.map(lambda x: minute_vwap_dict.get(x, np.nan))
+    one_minute_data['分VWAP'] = one_minute_data.pop('pv_sum') / one_minute_data['出来高']
     
     # データが存在する行のみを残す（NaNを除去）
     one_minute_data = one_minute_data.dropna()
@@ -242,56 +311,55 @@ def create_one_minute_chart(df: pd.DataFrame) -> pd.DataFrame:
     one_minute_data['VWAP'] = cumulative_price_volume / cumulative_volume
     
     # SMA5（終値の5期間移動平均）を計算
-    one_minute_data['SMA5'] = one_minute_data['終値'].rolling(window=5, min_periods=1).mean()
+    one_minute_data['SMA5'] = rolling_mean(one_minute_data['終値'].to_numpy(dtype=np.float64), 5)
     
     # 出来高移動平均5（出来高の5期間移動平均）を計算
-    one_minute_data['出来高MA5'] = one_minute_data['出来高'].rolling(window=5, min_periods=1).mean()
-    
-    # 価格帯を計算（前の足の終値を100で割って切り捨て、100を掛ける）
-    # ROUNDDOWN(前の足の終値/100,0)*100
-    prev_close = one_minute_data['終値'].shift(1)  # 前の足の終値
-    # 最初の行は前の足がないので、その行自身の終値を使う
-    prev_close = prev_close.fillna(one_minute_data['終値'])
-    one_minute_data['価格帯'] = (np.floor(prev_close / 100) * 100).astype(int)
-    
-    # 下落幅を計算（前の足の終値 - 安値）
-    one_minute_data['下落幅'] = prev_close - one_minute_data['安値']
-    
-    # 下ヒゲを計算（MIN(始値,終値) - 安値）
-    one_minute_data['下ヒゲ'] = np.minimum(one_minute_data['始値'], one_minute_data['終値']) - one_minute_data['安値']
-    
-    # 実体を計算（ABS(始値-終値)）
-    one_minute_data['実体'] = np.abs(one_minute_data['始値'] - one_minute_data['終値'])
-    
-    # 抽出条件を計算（IF(前の終値-安値>=MAX(価格帯/100+1,3),"◯","✕")）
-    # 前の終値-安値は既に「下落幅」として計算済み
-    max_threshold = np.maximum(one_minute_data['価格帯'] / 100 + 1, 3)
-    one_minute_data['抽出条件'] = np.where(one_minute_data['下落幅'] >= max_threshold, "◯", "✕")
-    
-    # 推奨下落幅を計算（前足の終値-足の安値-1）
-    one_minute_data['推奨下落幅'] = prev_close - one_minute_data['安値'] - 1
-    
-    # 推奨指値位置を計算（安値+1）
-    one_minute_data['推奨指値位置'] = one_minute_data['安値'] + 1
-    
-    # 当足で勝ちを計算（IF(終値-安値>=3,"◯","✕")）
-    one_minute_data['当足で勝ち'] = np.where(one_minute_data['終値'] - one_minute_data['安値'] >= 3, "◯", "✕")
-    
-    # 次足で勝ちを計算（IF(AND(次足の安値-安値>=-1,次足の高値-安値>=3),"◯","✕")）
-    next_low = one_minute_data['安値'].shift(-1)  # 次足の安値
-    next_high = one_minute_data['高値'].shift(-1)  # 次足の高値
-    condition1 = (next_low - one_minute_data['安値'] >= -1)  # 次足の安値-安値>=-1
-    condition2 = (next_high - one_minute_data['安値'] >= 3)  # 次足の高値-安値>=3
-    one_minute_data['次足で勝ち'] = np.where(condition1 & condition2, "◯", "✕")
-    
-    # 勝ちを計算（当足で勝ちまたは次足で勝ちのどちらかが◯なら◯、どちらも✕なら✕）
-    one_minute_data['勝ち'] = np.where(
-        (one_minute_data['当足で勝ち'] == "◯") | (one_minute_data['次足で勝ち'] == "◯"),
-        "◯", "✕"
-    )
-    
-    # 最低下落幅を計算（価格帯/100+1）
-    one_minute_data['最低下落幅'] = one_minute_data['価格帯'] / 100 + 1
+    one_minute_data['出来高MA5'] = rolling_mean(one_minute_data['出来高'].to_numpy(dtype=np.float64), 5)
+    
+    # 派生列はNumPy配列で一括計算し、最後に1回だけDataFrameへ結合する
+    open_ = one_minute_data['始値'].to_numpy(dtype=np.float64)
+    high = one_minute_data['高値'].to_numpy(dtype=np.float64)
+    low = one_minute_data['安値'].to_numpy(dtype=np.float64)
+    close = one_minute_data['終値'].to_numpy(dtype=np.float64)
+    
+    # 前の足の終値（最初の行は前の足がないので、その行自身の終値を使う）
+    prev_close = np.empty_like(close)
+    prev_close[0] = close[0]
+    prev_close[1:] = close[:-1]
+    
+    # 次足の安値・高値（最後の行は次足がないのでNaN）
+    next_low = np.full_like(low, np.nan)
+    next_low[:-1] = low[1:]
+    next_high = np.full_like(high, np.nan)
+    next_high[:-1] = high[1:]
+    
+    # 価格帯: ROUNDDOWN(前の足の終値/100,0)*100
+    price_band = (np.floor(prev_close / 100) * 100).astype(np.int64)
+    # 下落幅: 前の足の終値 - 安値
+    drop = prev_close - low
+    # 最低下落幅: 価格帯/100+1
+    min_drop = price_band / 100 + 1
+    # 抽出条件: IF(前の終値-安値>=MAX(価格帯/100+1,3),"◯","✕")
+    extract_cond = drop >= np.maximum(min_drop, 3)
+    # 当足で勝ち: IF(終値-安値>=3,"◯","✕")
+    win_now = (close - low) >= 3
+    # 次足で勝ち: IF(AND(次足の安値-安値>=-1,次足の高値-安値>=3),"◯","✕")
+    win_next = ((next_low - low) >= -1) & ((next_high - low) >= 3)
+    
+    derived = pd.DataFrame({
+        '価格帯': price_band,
+        '下落幅': drop,
+        '下ヒゲ': np.minimum(open_, close) - low,  # MIN(始値,終値) - 安値
+        '実体': np.abs(open_ - close),             # ABS(始値-終値)
+        '抽出条件': to_flag(extract_cond),
+        '推奨下落幅': drop - 1,                    # 前足の終値-足の安値-1
+        '推奨指値位置': low + 1,                   # 安値+1
+        '当足で勝ち': to_flag(win_now),
+        '次足で勝ち': to_flag(win_next),
+        '勝ち': to_flag(win_now | win_next),  # 当足で勝ちまたは次足で勝ちのどちらかが◯なら◯
+        '最低下落幅': min_drop
+    }, index=one_minute_data.index)
+    one_minute_data = pd.concat([one_minute_data, derived], axis=1)
     
     # 安値をつけてから1〜10秒以内に戻った幅を計算
     def calculate_recovery_after_low(minute_start: pd.Timestamp):
@@ -375,66 +443,71 @@ def create_one_minute_chart(df: pd.DataFrame) -> pd.DataFrame:
     
     # 列の順序を整理（時刻、高値、始値、終値、安値、出来高、VWAP、SMA5、出来高MA5、価格帯、下落幅、下ヒゲ、実体、抽出条件、推奨下落幅、推奨指値位置、当足で勝ち、次足で勝ち、勝ち、最低下落幅、安値をつけた秒数、安値から1秒戻り幅〜安値から10秒戻り幅）
     recovery_columns = [f'安値から{seconds}秒戻り幅' for seconds in range(1, 11)]
-    result = one_minute_data[['時刻', '高値', '始値', '終値', '安値', '出来高', 'VWAP', 'SMA5', '出来高MA5', '価格帯', '下落幅', '下ヒゲ', '実体', '抽出条件', '推奨下落幅', '推奨指値位置', '当足で勝ち', '次足で勝ち', '勝ち', '最低下落幅', '安値をつけた秒数'] + recovery_columns].copy()
+    result_columns = ['時刻', '高値', '始値', '終値', '安値', '出来高', 'VWAP', 'SMA5', '出来高MA5', '価格帯', '下落幅', '下ヒゲ', '実体', '抽出条件', '推奨下落幅', '推奨指値位置', '当足で勝ち', '次足で勝ち', '勝ち', '最低下落幅', '安値をつけた秒数'] + recovery_columns
     
     # 数値を整数または適切な小数に変換
-    result['始値'] = result['始値'].astype(float)
-    result['高値'] = result['高値'].astype(float)
-    result['安値'] = result['安値'].astype(float)
-    result['終値'] = result['終値'].astype(float)
-    result['出来高'] = result['出来高'].astype(int)
-    result['VWAP'] = result['VWAP'].astype(float).round(1)  # 小数点第1位まで
-    result['SMA5'] = result['SMA5'].astype(float).round(1)  # 小数点第1位まで
-    result['出来高MA5'] = result['出来高MA5'].astype(float).round(1)  # 小数点第1位まで
-    result['価格帯'] = result['価格帯'].astype(int)  # 整数
-    result['下落幅'] = result['下落幅'].astype(float).round(1)  # 小数点第1位まで
-    result['下ヒゲ'] = result['下ヒゲ'].astype(float).round(1)  # 小数点第1位まで
-    result['実体'] = result['実体'].astype(float).round(1)  # 小数点第1位まで
-    result['推奨下落幅'] = result['推奨下落幅'].astype(float).round(1)  # 小数点第1位まで
-    result['推奨指値位置'] = result['推奨指値位置'].astype(float).round(1)  # 小数点第1位まで
-    result['最低下落幅'] = result['最低下落幅'].astype(float).round(1)  # 小数点第1位まで
-    result['安値をつけた秒数'] = result['安値をつけた秒数'].astype(int)  # 整数
-    # 1秒から10秒までの戻り幅を小数点第1位まで
-    for seconds in range(1, 11):
-        col_name = f'安値から{seconds}秒戻り幅'
-        result[col_name] = result[col_name].astype(float).round(1)  # 小数点第1位まで
-    # 抽出条件、当足で勝ち、次足で勝ち、勝ちは文字列なので変換不要
+    int_columns = {'出来高', '価格帯', '安値をつけた秒数'}  # 整数
+    float_columns = {'始値', '高値', '安値', '終値'}
+    rounded_columns = {'VWAP', 'SMA5', '出来高MA5', '下落幅', '下ヒゲ', '実体', '推奨下落幅', '推奨指値位置', '最低下落幅'} | set(recovery_columns)  # 小数点第1位まで
+    flag_columns = {'抽出条件', '当足で勝ち', '次足で勝ち', '勝ち'}  # ◯/✕のカテゴリ型のまま保持
+    
+    # 各列を目的の型・丸めに変換した配列を集め、最後に1回だけDataFrameを構築する
+    arrays = {}
+    for col in result_columns:
+        values = one_minute_data[col]
+        if col in flag_columns:
+            arrays[col] = values.array
+            continue
+        if col in int_columns:
+            arrays[col] = values.to_numpy(dtype=np.int64)
+        elif col in float_columns:
+            arrays[col] = values.to_numpy(dtype=np.float64)
+        elif col in rounded_columns:
+            arrays[col] = np.round(values.to_numpy(dtype=np.float64), 1)
+        else:
+            arrays[col] = values.to_numpy()
+    
+    result = pd.DataFrame(arrays)
     
     return result
 
 
-def process_single_file(csv_path: Path, start_time: Optional[time] = None, end_time: Optional[time] = None) -> bool:
+def process_single_file(csv_path: Path, start_time: Optional[time] = None,
+                        end_time: Optional[time] = None) -> Tuple[bool, List[str]]:
     """
     単一のCSVファイルを処理して1分足データを作成
     
+    別プロセスで並列に実行されるため、メッセージはその場で出力せずに返し、
+    呼び出し側でファイルごとにまとめて出力する（他のファイルの出力と混ざらないようにする）
+    
     Args:
         csv_path: CSVファイルのパス
         start_time: 開始時刻（Noneの場合は全時間帯）
         end_time: 終了時刻（Noneの場合は全時間帯）
         
     Returns:
-        bool: 処理が成功したかどうか
+        tuple: (処理が成功したかどうか, 出力するメッセージのリスト)
     """
     # ファイル名から出力ファイル名を生成
     filename = csv_path.stem  # 拡張子なし
     output_filename = f"{filename}_one.csv"
     output_path = csv_path.parent / output_filename
     
-    print(f"処理中: {csv_path.name}")
+    messages = [f"処理中: {csv_path.name}"]
     
     # データを読み込み
-    df = load_tick_data(csv_path, start_time, end_time)
+    df = load_tick_data(csv_path, start_time, end_time, messages)
     
     if df is None or df.empty:
-        print(f"  警告: データが読み込めませんでした")
-        return False
+        messages.append(f"  警告: データが読み込めませんでした")
+        return False, messages
     
     # 1分足データを作成
     one_minute_df = create_one_minute_chart(df)
     
     if one_minute_df.empty:
-        print(f"  警告: 1分足データが作成できませんでした")
-        return False
+        messages.append(f"  警告: 1分足データが作成できませんでした")
+        return False, messages
     
     # CSVファイルに保存（数値列のフォーマットを調整）
     try:
@@ -445,18 +518,31 @@ def process_single_file(csv_path: Path, start_time: Optional[time] = None, end_t
         # 安値をつけた秒数は整数なのでフォーマット不要
         for col in float_columns:
             if col in df_to_save.columns:
-                df_to_save[col] = df_to_save[col].apply(
-                    lambda x: f"{int(x)}" if pd.notna(x) and isinstance(x, (int, float)) and x == int(x) 
-                    else f"{x:.1f}" if pd.notna(x) and isinstance(x, (int, float)) 
-                    else x
-                )
+                arr = df_to_save[col].to_numpy(dtype=np.float64)
+                is_nan = np.isnan(arr)
+                filled = np.where(is_nan, 0.0, arr)
+                is_int = filled == np.floor(filled)
+                s_int = np.char.mod('%d', filled.astype(np.int64))
+                s_flt = np.char.mod('%.1f', filled)
+                df_to_save[col] = np.where(is_nan, '', np.where(is_int, s_int, s_flt))
         
-        df_to_save.to_csv(output_path, index=False, encoding='utf-8-sig')
-        print(f"  保存完了: {output_filename} ({len(one_minute_df)}行)")
-        return True
+        if PYARROW_CSV_QUOTING_HEADER:
+            # pyarrowのCSVライターで書き出し（値に区切り文字や引用符は含まれないためクォートしない）
+            table = pa.Table.from_pandas(df_to_save, preserve_index=False)
+            with open(output_path, 'wb') as f:
+                f.write(b'\xef\xbb\xbf')  # utf-8-sigと同じBOMを付与
+                pacsv.write_csv(table, f, write_options=pacsv.WriteOptions(
+                    include_header=True,
+                    quoting_style='none',
+                    quoting_header='none'
+                ))
+        else:
+            df_to_save.to_csv(output_path, index=False, encoding='utf-8-sig')
+        messages.append(f"  保存完了: {output_filename} ({len(one_minute_df)}行)")
+        return True, messages
     except Exception as e:
-        print(f"  エラー: ファイル保存中にエラーが発生しました: {e}")
-        return False
+        messages.append(f"  エラー: ファイル保存中にエラーが発生しました: {e}")
+        return False, messages
 
 
 def parse_time_string(time_str: str) -> time:
@@ -551,19 +637,29 @@ def main():
     print(f"処理対象ファイル数: {len(csv_files)}")
     print("=" * 80)
     
-    # 各ファイルを処理
+    # 各ファイルを並列に処理（ファイル同士は独立しているため、プロセスごとに分散）
+    # （各ファイルのメッセージは処理が終わった順にファイル単位でまとめて出力する）
     success_count = 0
     error_count = 0
     
-    for csv_file in csv_files:
-        try:
-            if process_single_file(csv_file, start_time, end_time):
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        futures = {
+            executor.submit(process_single_file, csv_file, start_time, end_time): csv_file
+            for csv_file in csv_files
+        }
+        for future in as_completed(futures):
+            try:
+                success, messages = future.result()
+            except Exception as e:
+                print(f"処理中: {futures[future].name}")
+                print(f"  エラー: {e}")
+                error_count += 1
+                continue
+            print('\n'.join(messages))
+            if success:
                 success_count += 1
             else:
                 error_count += 1
-        except Exception as e:
-            print(f"  エラー: {e}")
-            error_count += 1
     
     print("\n" + "=" * 80)
     print(f"処理完了")
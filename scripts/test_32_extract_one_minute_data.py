@@ -14,13 +14,74 @@
 例:
     python test_32_extract_one_minute_data.py data/tick_chart/2342_20251205_one.csv 09:30
     python test_32_extract_one_minute_data.py data/tick_chart/2342_20251205_one.csv 09:30:00
+
+時刻を複数指定した場合は、最初に各行の先頭位置の索引（ラインインデックス）を作成し、
+以降はファイルをメモリマップして索引の位置から3行だけを読み込む
+環境変数 KABU_CACHE_LINE_INDEX=1 を指定すると、索引をCSVと同じ場所（拡張子 .csv.idx）へ保存し、
+以降の実行ではCSVより新しい限りそちらを使用する
 """
 
+import os
 import sys
+import csv
+import json
+import mmap
 import argparse
+from itertools import chain
+from operator import itemgetter
 from pathlib import Path
-import pandas as pd
-import numpy as np
+from typing import Any, Dict, Iterator, List, Optional
+
+
+# 前の足・次の足から取得する列
+NEIGHBOR_COLUMNS = ('高値', '始値', '終値', '安値', '出来高')
+
+# 前の足・次の足の出力項目名（前後の足がない場合は空欄）
+PREV_FIELDS = tuple(f'前の足の{col}' for col in NEIGHBOR_COLUMNS)
+NEXT_FIELDS = tuple(f'次の足の{col}' for col in NEIGHBOR_COLUMNS)
+
+# 現在の足から取得する列
+CURRENT_COLUMNS = (
+    'VWAP', 'SMA5', '高値', '始値', '終値', '安値', '出来高', '出来高MA5', '価格帯',
+    '下落幅', '下ヒゲ', '実体', '抽出条件', '当足で勝ち', '次足で勝ち', '勝ち', '最低下落幅'
+)
+
+# 出力する列の順序
+COLUMN_ORDER = (
+    'VWAP',
+    'SMA5',
+    '前の足の高値',
+    '前の足の始値',
+    '前の足の終値',
+    '前の足の安値',
+    '高値',
+    '始値',
+    '終値',
+    '安値',
+    '次の足の高値',
+    '次の足の始値',
+    '次の足の終値',
+    '次の足の安値',
+    '出来高MA5',
+    '前の足の出来高',
+    '出来高',
+    '次の足の出来高',
+    '価格帯',
+    '下落幅',
+    '下ヒゲ',
+    '実体',
+    '抽出条件',
+    '当足で勝ち',
+    '次足で勝ち',
+    '勝ち',
+    '最低下落幅',
+)
+
+# ラインインデックスの重複した時刻を表す行番号
+DUPLICATE_ROW = -1
+
+# 出力する列の値をデータの辞書から順序どおりにまとめて取り出す
+_get_output_values = itemgetter(*COLUMN_ORDER)
 
 
 def parse_time_string(time_str: str) -> str:
@@ -42,99 +103,235 @@ def parse_time_string(time_str: str) -> str:
     return time_str
 
 
-def extract_one_minute_data(csv_path: Path, target_time: str) -> pd.Series:
+def line_index_cache_enabled() -> bool:
     """
-    1分足データから指定時間の情報を抽出
+    ラインインデックスのファイル保存が有効かどうかを返す
+    
+    Returns:
+        bool: 環境変数 KABU_CACHE_LINE_INDEX が "1" の場合True
+    """
+    return os.environ.get('KABU_CACHE_LINE_INDEX') == '1'
+
+
+def _parse_line(line: bytes) -> List[str]:
+    """
+    CSVの1行（バイト列）を列の値のリストに変換
+    
+    Args:
+        line: CSVの1行
+        
+    Returns:
+        list: 列の値のリスト（空行の場合は空リスト）
+    """
+    return next(csv.reader([line.decode('utf-8')]), [])
+
+
+def build_line_index(csv_path: Path) -> Dict[str, Any]:
+    """
+    CSVファイルを1回走査して、データ行ごとの先頭バイト位置と時刻から行番号への索引を作成
     
     Args:
         csv_path: 1分足データCSVファイルのパス
-        target_time: 抽出する時間（"HH:MM"形式）
         
     Returns:
-        pd.Series: 抽出されたデータ（前の足、現在の足、次の足を含む）
+        dict: header（ヘッダーの列名）、offsets（データ行の先頭バイト位置）、
+              rows（時刻から行番号への辞書、重複した時刻はDUPLICATE_ROW）
     """
-    # CSVファイルを読み込み
-    df = pd.read_csv(csv_path, encoding='utf-8-sig')
+    offsets: List[int] = []
+    rows: Dict[str, int] = {}
     
-    # 時刻列を確認
-    if '時刻' not in df.columns:
-        raise ValueError("CSVファイルに'時刻'列が見つかりません")
+    with open(csv_path, 'rb') as f:
+        header = next(csv.reader([f.readline().decode('utf-8-sig')]), [])
+        if '時刻' not in header:
+            raise ValueError("CSVファイルに'時刻'列が見つかりません")
+        time_pos = header.index('時刻')
+        
+        while True:
+            offset = f.tell()
+            line = f.readline()
+            if not line:
+                break
+            row = _parse_line(line)
+            if not row:
+                continue
+            if time_pos < len(row):
+                time_value = row[time_pos]
+                rows[time_value] = DUPLICATE_ROW if time_value in rows else len(offsets)
+            offsets.append(offset)
     
-    # 時間を正規化
-    normalized_time = parse_time_string(target_time)
+    return {'header': header, 'offsets': offsets, 'rows': rows}
+
+
+def load_line_index(csv_path: Path) -> Dict[str, Any]:
+    """
+    ラインインデックスを取得（保存が有効な場合は保存済みの索引を使い、なければ作成して保存する）
+    
+    Args:
+        csv_path: 1分足データCSVファイルのパス
+        
+    Returns:
+        dict: build_line_indexで作成した索引
+    """
+    if not line_index_cache_enabled():
+        return build_line_index(csv_path)
     
-    # 指定された時間の行を検索
-    matching_rows = df[df['時刻'] == normalized_time]
+    idx_path = Path(f"{csv_path}.idx")
+    if idx_path.exists() and idx_path.stat().st_mtime >= csv_path.stat().st_mtime:
+        try:
+            with open(idx_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"警告: ラインインデックスの読み込みに失敗しました: {idx_path} - {e}", file=sys.stderr)
     
-    if matching_rows.empty:
-        raise ValueError(f"指定された時間 '{target_time}' のデータが見つかりません")
+    line_index = build_line_index(csv_path)
+    try:
+        with open(idx_path, 'w', encoding='utf-8') as f:
+            json.dump(line_index, f, ensure_ascii=False)
+    except OSError as e:
+        print(f"警告: ラインインデックスの保存に失敗しました: {idx_path} - {e}", file=sys.stderr)
+    return line_index
+
+
+def _next_row(reader: Iterator[List[str]]) -> Optional[List[str]]:
+    """
+    CSVリーダーから空行を読み飛ばして次の行を取得
     
-    if len(matching_rows) > 1:
+    Args:
+        reader: csv.readerのイテレータ
+        
+    Returns:
+        list: 次の行の値のリスト（ファイル末尾の場合はNone）
+    """
+    for row in reader:
+        if row:
+            return row
+    return None
+
+
+def _scan_rows(csv_path: Path, normalized_time: str, target_time: str):
+    """
+    CSVを先頭から1行ずつ読み、指定時間の行とその前後の行を取得
+    （次の足より後の行は時刻列だけを比較し、指定時間の行が他にもあれば重複とする）
+    
+    Args:
+        csv_path: 1分足データCSVファイルのパス
+        normalized_time: 正規化された時間（"HH:MM"形式）
+        target_time: エラーメッセージに表示する指定時間
+        
+    Returns:
+        tuple: (ヘッダー, 前の足の行, 現在の足の行, 次の足の行)、前後の足がない場合はNone
+    """
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = _next_row(reader) or []
+        if '時刻' not in header:
+            raise ValueError("CSVファイルに'時刻'列が見つかりません")
+        time_pos = header.index('時刻')
+        
+        # 指定された時間の行を検索（直前の行を前の足として保持する）
+        prev_row = None
+        while True:
+            row = _next_row(reader)
+            if row is None:
+                raise ValueError(f"指定された時間 '{target_time}' のデータが見つかりません")
+            if time_pos < len(row) and row[time_pos] == normalized_time:
+                current_row = row
+                break
+            prev_row = row
+        
+        # 次の足を取得
+        next_row = _next_row(reader)
+        
+        # 次の足以降に同じ時刻の行があれば重複とみなす
+        # （ラインインデックスを使う場合と同じく、隣接していない重複も検出する）
+        if next_row is not None:
+            for row in chain((next_row,), reader):
+                if time_pos < len(row) and row[time_pos] == normalized_time:
+                    raise ValueError(f"指定された時間 '{target_time}' のデータが複数見つかりました")
+    
+    return header, prev_row, current_row, next_row
+
+
+def _seek_rows(csv_path: Path, line_index: Dict[str, Any], normalized_time: str, target_time: str):
+    """
+    ラインインデックスを使い、メモリマップしたCSVから指定時間の行とその前後の行だけを読み込む
+    
+    Args:
+        csv_path: 1分足データCSVファイルのパス
+        line_index: build_line_indexで作成した索引
+        normalized_time: 正規化された時間（"HH:MM"形式）
+        target_time: エラーメッセージに表示する指定時間
+        
+    Returns:
+        tuple: (ヘッダー, 前の足の行, 現在の足の行, 次の足の行)、前後の足がない場合はNone
+    """
+    current_pos = line_index['rows'].get(normalized_time)
+    if current_pos is None:
+        raise ValueError(f"指定された時間 '{target_time}' のデータが見つかりません")
+    if current_pos == DUPLICATE_ROW:
         raise ValueError(f"指定された時間 '{target_time}' のデータが複数見つかりました")
     
-    # 現在の足のインデックスを取得
-    current_idx = matching_rows.index[0]
+    offsets = line_index['offsets']
+    with open(csv_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        def read_row(pos: int) -> Optional[List[str]]:
+            if pos < 0 or pos >= len(offsets):
+                return None
+            mm.seek(offsets[pos])
+            return _parse_line(mm.readline())
+        
+        rows = [read_row(pos) for pos in (current_pos - 1, current_pos, current_pos + 1)]
     
-    # 前の足と次の足のデータを取得
-    prev_idx = current_idx - 1 if current_idx > 0 else None
-    next_idx = current_idx + 1 if current_idx < len(df) - 1 else None
+    return (line_index['header'], *rows)
+
+
+def extract_one_minute_data(csv_path: Path, target_time: str,
+                            line_index: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    1分足データから指定時間の情報を抽出
     
-    # データを整理
-    result_data = {}
+    pandasを使わずにCSVを読み、ラインインデックスが指定された場合は該当する3行だけを読み込む
     
-    # 現在の足のデータ
-    current_row = df.loc[current_idx]
+    Args:
+        csv_path: 1分足データCSVファイルのパス
+        target_time: 抽出する時間（"HH:MM"形式）
+        line_index: load_line_indexで取得した索引（省略時はCSVを先頭から読む）
+        
+    Returns:
+        dict: 抽出されたデータ（前の足、現在の足、次の足を含む）
+    """
+    # 時間を正規化
+    normalized_time = parse_time_string(target_time)
     
-    # 前の足のデータ
-    if prev_idx is not None:
-        prev_row = df.loc[prev_idx]
-        result_data['前の足の高値'] = prev_row.get('高値', '')
-        result_data['前の足の始値'] = prev_row.get('始値', '')
-        result_data['前の足の終値'] = prev_row.get('終値', '')
-        result_data['前の足の安値'] = prev_row.get('安値', '')
-        result_data['前の足の出来高'] = prev_row.get('出来高', '')
+    if line_index is None:
+        header, prev_row, current_row, next_row = _scan_rows(csv_path, normalized_time, target_time)
     else:
-        result_data['前の足の高値'] = ''
-        result_data['前の足の始値'] = ''
-        result_data['前の足の終値'] = ''
-        result_data['前の足の安値'] = ''
-        result_data['前の足の出来高'] = ''
+        header, prev_row, current_row, next_row = _seek_rows(csv_path, line_index, normalized_time, target_time)
+    
+    # 出力する列の位置（CSVに存在しない列はNoneとし、出力では空欄にする）
+    column_positions = [(col, header.index(col) if col in header else None) for col in CURRENT_COLUMNS]
+    
+    def row_values(row: List[str]) -> Dict[str, str]:
+        return {col: row[pos] if pos is not None and pos < len(row) else '' for col, pos in column_positions}
+    
+    # データを整理（前後の足の項目は空欄で初期化し、足が存在する場合のみ上書きする）
+    result_data = dict.fromkeys(PREV_FIELDS + NEXT_FIELDS, '')
+    
+    # 前の足のデータ
+    if prev_row is not None:
+        prev_values = row_values(prev_row)
+        for field, col in zip(PREV_FIELDS, NEIGHBOR_COLUMNS):
+            result_data[field] = prev_values[col]
     
     # 現在の足のデータ
-    result_data['VWAP'] = current_row.get('VWAP', '')
-    result_data['SMA5'] = current_row.get('SMA5', '')
-    result_data['高値'] = current_row.get('高値', '')
-    result_data['始値'] = current_row.get('始値', '')
-    result_data['終値'] = current_row.get('終値', '')
-    result_data['安値'] = current_row.get('安値', '')
-    result_data['出来高'] = current_row.get('出来高', '')
-    result_data['出来高MA5'] = current_row.get('出来高MA5', '')
-    result_data['価格帯'] = current_row.get('価格帯', '')
-    result_data['下落幅'] = current_row.get('下落幅', '')
-    result_data['下ヒゲ'] = current_row.get('下ヒゲ', '')
-    result_data['実体'] = current_row.get('実体', '')
-    result_data['抽出条件'] = current_row.get('抽出条件', '')
-    result_data['当足で勝ち'] = current_row.get('当足で勝ち', '')
-    result_data['次足で勝ち'] = current_row.get('次足で勝ち', '')
-    result_data['勝ち'] = current_row.get('勝ち', '')
-    result_data['最低下落幅'] = current_row.get('最低下落幅', '')
+    result_data.update(row_values(current_row))
     
     # 次の足のデータ
-    if next_idx is not None:
-        next_row = df.loc[next_idx]
-        result_data['次の足の高値'] = next_row.get('高値', '')
-        result_data['次の足の始値'] = next_row.get('始値', '')
-        result_data['次の足の終値'] = next_row.get('終値', '')
-        result_data['次の足の安値'] = next_row.get('安値', '')
-        result_data['次の足の出来高'] = next_row.get('出来高', '')
-    else:
-        result_data['次の足の高値'] = ''
-        result_data['次の足の始値'] = ''
-        result_data['次の足の終値'] = ''
-        result_data['次の足の安値'] = ''
-        result_data['次の足の出来高'] = ''
+    if next_row is not None:
+        next_values = row_values(next_row)
+        for field, col in zip(NEXT_FIELDS, NEIGHBOR_COLUMNS):
+            result_data[field] = next_values[col]
     
-    return pd.Series(result_data)
+    return result_data
 
 
 def get_column_order():
@@ -144,38 +341,10 @@ def get_column_order():
     Returns:
         list: 列名のリスト
     """
-    return [
-        'VWAP',
-        'SMA5',
-        '前の足の高値',
-        '前の足の始値',
-        '前の足の終値',
-        '前の足の安値',
-        '高値',
-        '始値',
-        '終値',
-        '安値',
-        '次の足の高値',
-        '次の足の始値',
-        '次の足の終値',
-        '次の足の安値',
-        '出来高MA5',
-        '前の足の出来高',
-        '出来高',
-        '次の足の出来高',
-        '価格帯',
-        '下落幅',
-        '下ヒゲ',
-        '実体',
-        '抽出条件',
-        '当足で勝ち',
-        '次足で勝ち',
-        '勝ち',
-        '最低下落幅'
-    ]
-
-
-def format_output(data: pd.Series, include_header: bool = False) -> str:
+    return list(COLUMN_ORDER)
+
+
+def format_output(data: Dict[str, Any], include_header: bool = False) -> str:
     """
     データを指定された順序でCSV形式の文字列に変換
     
@@ -186,20 +355,14 @@ def format_output(data: pd.Series, include_header: bool = False) -> str:
     Returns:
         str: CSV形式の文字列
     """
-    column_order = get_column_order()
-    
-    # データ行
-    values = []
-    for col in column_order:
-        value = data.get(col, '')
-        # 数値の場合はそのまま、文字列の場合はそのまま
-        values.append(str(value))
+    # データ行（extract_one_minute_dataの結果は全項目を含むため、1回の呼び出しで値を取り出す）
+    values = _get_output_values(data)
     
-    data_row = ','.join(values)
+    data_row = ','.join(map(str, values))
     
     if include_header:
         # ヘッダー行
-        header = ','.join(column_order)
+        header = ','.join(COLUMN_ORDER)
         return f"{header}\n{data_row}"
     else:
         return data_row
@@ -230,11 +393,16 @@ def main():
         header = ','.join(column_order)
         print(header)
         
+        # 時刻を複数指定した場合や索引の保存が有効な場合は、ラインインデックスで該当行を直接読み込む
+        line_index = None
+        if len(args.times) > 1 or line_index_cache_enabled():
+            line_index = load_line_index(csv_path)
+        
         # 各時刻のデータを抽出して出力
         for time_str in args.times:
             try:
                 # データを抽出
-                data = extract_one_minute_data(csv_path, time_str)
+                data = extract_one_minute_data(csv_path, time_str, line_index)
                 
                 # CSV形式で出力（ヘッダーなし）
                 output = format_output(data, include_header=False)
@@ -23,6 +23,8 @@ from pathlib import Path
 import pandas as pd
 import numpy as np
 
+from one_minute_csv import read_one_minute_csv
+
 
 def analyze_one_minute_data(csv_path: Path, verification_value: float) -> pd.DataFrame:
     """
@@ -35,35 +37,37 @@ def analyze_one_minute_data(csv_path: Path, verification_value: float) -> pd.Dat
     Returns:
         pd.DataFrame: 抽出したデータ（時刻、10秒以内に出来る最大利確）
     """
-    # CSVファイルを読み込み
-    df = pd.read_csv(csv_path, encoding='utf-8-sig')
+    # CSVファイルを読み込み（必要な列のみをパース）
+    required_columns = ['時刻', '推奨下落幅', '安値から10秒戻り幅']
+    df = read_one_minute_csv(
+        csv_path,
+        required_columns,
+        dtype={'時刻': 'string', '推奨下落幅': 'float64', '安値から10秒戻り幅': 'float64'}
+    )
     
     # 必要な列が存在するか確認
-    required_columns = ['時刻', '推奨下落幅', '安値から10秒戻り幅']
     for col in required_columns:
         if col not in df.columns:
             raise ValueError(f"CSVファイルに'{col}'列が見つかりません")
     
-    # 推奨下落幅>=検証値の1分足を抽出
-    filtered_df = df[df['推奨下落幅'] >= verification_value].copy()
+    # 推奨下落幅>=検証値の1分足を抽出（マスクは1回だけ作成）
+    drop = df['推奨下落幅'].to_numpy(dtype=np.float64)
+    mask = drop >= verification_value
     
-    if filtered_df.empty:
+    if not mask.any():
         return pd.DataFrame(columns=['時刻', '10秒以内に出来る最大利確'])
     
     # 10秒以内に出来る最大利確を計算
-    # 計算式: 安値から10秒戻り幅 - (推奨下落幅 - 6 + 1)
-    filtered_df['10秒以内に出来る最大利確'] = (
-        filtered_df['安値から10秒戻り幅'] - (filtered_df['推奨下落幅'] - 6 + 1)
-    )
-    
-    # NaN値を0に置き換え（データがない場合）
-    filtered_df['10秒以内に出来る最大利確'] = filtered_df['10秒以内に出来る最大利確'].fillna(0)
-    
-    # 時刻と10秒以内に出来る最大利確のみを抽出
-    result = filtered_df[['時刻', '10秒以内に出来る最大利確']].copy()
+    # 計算式: 安値から10秒戻り幅 - (推奨下落幅 - 6 + 1) = 安値から10秒戻り幅 - (推奨下落幅 - 5)
+    # NaN値は0に置き換え（データがない場合）、小数点第1位まで丸める
+    recovery = df['安値から10秒戻り幅'].to_numpy(dtype=np.float64)[mask]
+    profit = np.round(np.nan_to_num(recovery - (drop[mask] - 5), nan=0.0), 1)
     
-    # 数値をfloat型に変換してから丸める
-    result['10秒以内に出来る最大利確'] = result['10秒以内に出来る最大利確'].astype(float).round(1)
+    # 時刻と10秒以内に出来る最大利確のみのDataFrameを一度に構築
+    result = pd.DataFrame({
+        '時刻': df['時刻'].to_numpy()[mask],
+        '10秒以内に出来る最大利確': profit
+    })
     
     return result
 
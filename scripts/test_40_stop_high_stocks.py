@@ -22,12 +22,42 @@
 
 import os
 import sys
+import json
 from pathlib import Path
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
+# orjsonはオプション（インストールされていればレスポンスのJSONを高速にパースする）
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# 株価データのうちDataFrameに取り込むV2 APIの列
+PRICE_RECORD_COLUMNS = ['Date', 'H', 'L', 'O', 'C', 'Vo']
+
+# 価格列の型（Volumeは欠損値を含む場合があるため推論に任せる）
+# （float32に落とすと0.1円単位の価格が丸められ、13%の閾値付近でストップ高の判定が変わるためfloat64のままにする）
+PRICE_DTYPES = {'H': 'float64', 'L': 'float64', 'O': 'float64', 'C': 'float64'}
+
+# API呼び出しで使い回すセッション（TCP/TLS接続をプールし、一時的なエラーは自動でリトライする）
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.2,
+        status_forcelist=[429, 500, 502, 503, 504],
+        raise_on_status=False  # リトライしきれなかった場合はraise_for_statusでHTTPErrorにする
+    )
+))
+
 
 def load_api_key(apikey_file_path):
     """
@@ -100,19 +130,19 @@ def get_stock_price_three_months(api_key, code, months=3):
         }
         
         # APIリクエスト
-        response = requests.get(base_url, headers=headers, params=params)
+        response = _SESSION.get(base_url, headers=headers, params=params, timeout=(3.05, 10))
         response.raise_for_status()
         
-        # レスポンスをJSONとして取得
-        data = response.json()
+        # レスポンスをJSONとして取得（orjsonがあればバイト列から直接パースする）
+        data = orjson.loads(response.content) if ORJSON_AVAILABLE else json.loads(response.content)
         
         # V2 APIのレスポンス形式: {"data": [...], "pagination_key": "..."}
         if 'data' not in data or not data['data']:
             print(f"警告: 銘柄コード {code} のデータが見つかりませんでした")
             return pd.DataFrame()
         
-        # データフレームに変換
-        df = pd.DataFrame(data['data'])
+        # 必要な列だけをデータフレームに変換し、価格列は型を明示する
+        df = pd.DataFrame.from_records(data['data'], columns=PRICE_RECORD_COLUMNS).astype(PRICE_DTYPES, copy=False)
         
         if df.empty:
             print(f"警告: 銘柄コード {code} のデータが見つかりませんでした")
@@ -133,8 +163,11 @@ def get_stock_price_three_months(api_key, code, months=3):
         
         # 日付でソート（古い順にソート、ストップ高判定のため）
         if 'Date' in df.columns:
-            df['Date'] = pd.to_datetime(df['Date'])
-            df = df.sort_values('Date', ascending=True).reset_index(drop=True)
+            # V2 APIの日付は"YYYY-MM-DD"形式のため、書式を指定して推論を省く
+            df['Date'] = pd.to_datetime(df['Date'], format='%Y-%m-%d')
+            # V2 APIは日付順に返すため、順序が崩れている場合のみソートする
+            if not df['Date'].is_monotonic_increasing:
+                df = df.sort_values('Date', ignore_index=True)
         
         print(f"株価データを取得しました: {len(df)} 件")
         return df
@@ -164,6 +197,7 @@ def detect_stop_high(df, threshold_rate=0.13):
         
     Returns:
         pandas.DataFrame: ストップ高をつけた日のデータフレーム
+                          （attrs['latest_stop_high_str']に最新のストップ高日を"YYYY-MM-DD"形式で持つ）
     """
     if df.empty or 'High' not in df.columns or 'Close' not in df.columns:
         return pd.DataFrame()
@@ -175,31 +209,37 @@ def detect_stop_high(df, threshold_rate=0.13):
         print(f"警告: 必要な列が見つかりません: {missing_columns}")
         return pd.DataFrame()
     
-    # 前日の終値を計算（shift(1)で1行ずらす）
-    df = df.copy()
-    df['前日終値'] = df['Close'].shift(1)
+    # 前日比上昇率をNumPy配列で計算（入力DataFrameのコピーや列の追加は行わない）
+    high = df['High'].to_numpy(dtype=np.float64)
+    close = df['Close'].to_numpy(dtype=np.float64)
     
-    # 前日比上昇率を計算: (当日高値 - 前日終値) / 前日終値
-    df['前日比上昇率'] = (df['High'] - df['前日終値']) / df['前日終値']
+    # 前日比上昇率を計算: (当日高値 - 前日終値) / 前日終値（初日は前日終値がないためNaN）
+    rate = np.empty_like(close)
+    rate[:1] = np.nan
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(high[1:] - close[:-1], close[:-1], out=rate[1:])
     
     # ストップ高の判定: 前日比上昇率 >= 閾値
-    df['ストップ高'] = df['前日比上昇率'] >= threshold_rate
+    idx = np.flatnonzero(rate >= threshold_rate)
     
-    # ストップ高をつけた日を抽出
-    stop_high_df = df[df['ストップ高'] == True].copy()
-    
-    # 必要な列のみを残す
     result_columns = ['Date', 'High', 'Close', '前日終値', '前日比上昇率']
-    available_columns = [col for col in result_columns if col in stop_high_df.columns]
-    
-    if stop_high_df.empty:
-        return pd.DataFrame(columns=available_columns)
+    if idx.size == 0:
+        return pd.DataFrame(columns=result_columns)
     
-    result_df = stop_high_df[available_columns].copy()
+    # ストップ高をつけた日の行だけを配列から取り出して結果のDataFrameを組み立てる
+    rate_hit = rate[idx]
+    result_df = pd.DataFrame({
+        'Date': df['Date'].to_numpy()[idx],
+        'High': high[idx],
+        'Close': close[idx],
+        '前日終値': close[idx - 1],
+        '前日比上昇率': rate_hit,
+        # 前日比上昇率をパーセント表示に変換（表示用）
+        '前日比上昇率(%)': np.round(rate_hit * 100, 2)
+    }, index=df.index[idx])
     
-    # 前日比上昇率をパーセント表示に変換（表示用）
-    if '前日比上昇率' in result_df.columns:
-        result_df['前日比上昇率(%)'] = (result_df['前日比上昇率'] * 100).round(2)
+    # 最新のストップ高日を表示用の文字列として添付する（呼び出し側で最終行を参照し直さない）
+    result_df.attrs['latest_stop_high_str'] = pd.Timestamp(result_df['Date'].iat[-1]).strftime('%Y-%m-%d')
     
     return result_df
 
@@ -228,34 +268,31 @@ def display_stop_high_results(stop_high_df, code, months=3):
     print("ストップ高をつけた日:")
     print("-" * 70)
     
-    for i, (_, row) in enumerate(stop_high_df.iterrows(), 1):
-        date_str = row['Date'].strftime('%Y-%m-%d') if hasattr(row['Date'], 'strftime') else str(row['Date'])
-        high = row.get('High', 'N/A')
-        close = row.get('Close', 'N/A')
-        prev_close = row.get('前日終値', 'N/A')
-        rate = row.get('前日比上昇率(%)', 'N/A')
-        
-        print(f"  {i:2d}. {date_str}")
-        print(f"      高値: {high:,.0f}円" if isinstance(high, (int, float)) else f"      高値: {high}")
-        print(f"      終値: {close:,.0f}円" if isinstance(close, (int, float)) else f"      終値: {close}")
-        print(f"      前日終値: {prev_close:,.0f}円" if isinstance(prev_close, (int, float)) else f"      前日終値: {prev_close}")
-        print(f"      前日比上昇率: {rate}%" if isinstance(rate, (int, float)) else f"      前日比上昇率: {rate}")
-        print()
+    # 日付を一括で文字列に変換し、各列の書式を指定して表全体を1回で整形する
+    view = stop_high_df[['Date', 'High', 'Close', '前日終値', '前日比上昇率(%)']].copy()
+    view['Date'] = view['Date'].dt.strftime('%Y-%m-%d')
+    view.columns = ['日付', '高値', '終値', '前日終値', '前日比上昇率']
+    print(view.to_string(index=False, formatters={
+        '高値': '{:,.0f}円'.format,
+        '終値': '{:,.0f}円'.format,
+        '前日終値': '{:,.0f}円'.format,
+        '前日比上昇率': '{:.2f}%'.format
+    }))
+    print()
     
     # 統計情報
     if '前日比上昇率' in stop_high_df.columns:
         rates = stop_high_df['前日比上昇率'].dropna()
         if not rates.empty:
+            rate_stats = rates.agg(['mean', 'max', 'min'])
             print("統計情報:")
-            print(f"  平均上昇率: {(rates.mean() * 100):.2f}%")
-            print(f"  最大上昇率: {(rates.max() * 100):.2f}%")
-            print(f"  最小上昇率: {(rates.min() * 100):.2f}%")
+            print(f"  平均上昇率: {(rate_stats['mean'] * 100):.2f}%")
+            print(f"  最大上昇率: {(rate_stats['max'] * 100):.2f}%")
+            print(f"  最小上昇率: {(rate_stats['min'] * 100):.2f}%")
             print()
     
-    # 最新のストップ高日
-    latest_stop_high = stop_high_df.iloc[-1]
-    latest_date_str = latest_stop_high['Date'].strftime('%Y-%m-%d') if hasattr(latest_stop_high['Date'], 'strftime') else str(latest_stop_high['Date'])
-    print(f"最新ストップ高日: {latest_date_str}")
+    # 最新のストップ高日（detect_stop_highで整形済みの文字列を使う）
+    print(f"最新ストップ高日: {stop_high_df.attrs['latest_stop_high_str']}")
     
     print("=" * 70)
 
@@ -332,9 +369,7 @@ def main():
         print(f"ストップ高回数: {len(stop_high_df)} 回")
         
         if not stop_high_df.empty:
-            latest_date = stop_high_df.iloc[-1]['Date']
-            latest_date_str = latest_date.strftime('%Y-%m-%d') if hasattr(latest_date, 'strftime') else str(latest_date)
-            print(f"最新ストップ高日: {latest_date_str}")
+            print(f"最新ストップ高日: {stop_high_df.attrs['latest_stop_high_str']}")
         
         print("\n処理が完了しました。")
         
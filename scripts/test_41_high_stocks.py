@@ -6,17 +6,19 @@
 処理内容:
 1. 最新取引日の全銘柄株価を一括取得（1回のAPIコール）
 2. 600円以下の銘柄をフィルタリング
-3. フィルタリングされた銘柄の過去3ヶ月の株価データを取得
+3. 過去3ヶ月の株価データを日付ごとに全銘柄まとめて取得し、フィルタリングされた銘柄に分ける
 4. ストップ高を検出（前日比13%以上上昇した日をストップ高と判定）
 5. 結果をCSV出力
 
 使用方法:
-    python test_41_high_stocks.py [--min-price MIN] [--max-price MAX] [--delay DELAY] [--max-errors MAX] [--output OUTPUT] [--max-stocks MAX]
+    python test_41_high_stocks.py [--min-price MIN] [--max-price MAX] [--delay DELAY] [--workers N] [--max-errors MAX] [--output OUTPUT] [--cache] [--max-stocks MAX]
 
 例:
     python test_41_high_stocks.py
     python test_41_high_stocks.py --min-price 100 --max-price 600 --delay 0.6
     python test_41_high_stocks.py --max-stocks 100  # テスト用
+    python test_41_high_stocks.py --workers 16 --delay 0.1
+    python test_41_high_stocks.py --cache  # 再実行時は過去日の株価データをキャッシュから読み込む
 
 前提条件:
     - apikey.txtファイルにAPIキー（V2 APIキー）が記述されていること
@@ -26,14 +28,121 @@
 import os
 import sys
 import time
+import json
 import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 
+# orjsonはオプション（インストールされていればレスポンスのJSONを高速にパースする）
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# pyarrowはオプション（インストールされていれば結果のCSVをpyarrowで書き出し、
+# --cacheで株価データをParquetにキャッシュできる）
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# CSVライターのquoting_header（ヘッダー行のクォート指定）は古いpyarrow（18以前）にはないため、
+# 指定できない場合は結果のCSVをpyarrowでは書き出さずにpandasで書き出す
+PYARROW_CSV_QUOTING_HEADER = False
+if PYARROW_AVAILABLE:
+    try:
+        pacsv.WriteOptions(quoting_header='all_valid')
+        PYARROW_CSV_QUOTING_HEADER = True
+    except TypeError:
+        pass
+
+# numbaはオプション（インストールされていれば全銘柄のストップ高判定をJITコンパイルしたループで並列に行う）
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """numbaがない場合は関数をそのまま返す"""
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# 日足データのV2 APIのカラム名からV1形式のカラム名への変換
+V2_COLUMN_MAPPING = {
+    'H': 'High',
+    'C': 'Close',
+    'O': 'Open',
+    'L': 'Low',
+    'Vo': 'Volume'
+}
+
+# API呼び出しで使い回すセッション（TCP/TLS接続をプールし、一時的なエラーは自動でリトライする）
+# （ワーカースレッドから同時に使うため、プールの上限は十分に大きくする）
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=64,
+    pool_maxsize=64,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        raise_on_status=False  # リトライしきれなかった場合はraise_for_statusでHTTPErrorにする
+    )
+))
+
+
+class RateLimiter:
+    """
+    複数スレッドから共有し、API呼び出しの開始間隔を一定以上に保つ
+    """
+    
+    def __init__(self, interval: float):
+        """
+        Args:
+            interval (float): API呼び出しの最小間隔（秒）
+        """
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+    
+    def wait(self):
+        """次のAPI呼び出しが可能になるまで待機する"""
+        with self._lock:
+            now = time.monotonic()
+            wait_time = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.interval
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
+def parse_json_response(response):
+    """
+    レスポンスの本文をJSONとしてパースする（orjsonがあればバイト列から直接パースする）
+    
+    Args:
+        response (requests.Response): APIのレスポンス
+        
+    Returns:
+        dict: パースしたJSON
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(response.content)
+    return json.loads(response.content)
+
 
 def load_api_key(apikey_file_path):
     """
@@ -86,11 +195,11 @@ def get_stock_list_v2(api_key):
         print("銘柄一覧を取得中...")
         
         # APIリクエスト
-        response = requests.get(base_url, headers=headers)
+        response = _SESSION.get(base_url, headers=headers, timeout=(3.05, 30))
         response.raise_for_status()
         
         # レスポンスをJSONとして取得
-        data = response.json()
+        data = parse_json_response(response)
         
         # V2 APIのレスポンス形式: {"data": [...], "pagination_key": "..."}
         if 'data' not in data or not data['data']:
@@ -147,6 +256,195 @@ def filter_target_markets(df):
     return filtered_df
 
 
+def compute_date_range(months=3):
+    """
+    get_stock_prices_by_datesに渡す過去Nヶ月の取得期間を計算する（全日付に共通のため、最初に1回だけ呼ぶ）
+    
+    Args:
+        months (int): 取得する月数（デフォルト: 3）
+        
+    Returns:
+        tuple: (開始日, 終了日) の"YYYYMMDD"形式の文字列
+    """
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=months * 30)  # 約Nヶ月前
+    return start_date.strftime('%Y%m%d'), end_date.strftime('%Y%m%d')
+
+
+def get_all_stocks_prices_by_date(api_key, date_str, limiter: Optional[RateLimiter] = None,
+                                  cache_dir: Optional[Path] = None):
+    """
+    指定日の全銘柄の日足データを取得する（ページングされている場合は全ページを取得する）
+    
+    cache_dirを指定した場合は取得結果をParquetファイルに保存し、2回目以降の取得では
+    APIを呼び出さずにキャッシュから読み込む（日足が確定している過去の日付にのみ指定すること）
+    
+    Args:
+        api_key (str): J-Quants APIキー
+        date_str (str): 取得する日付（"YYYYMMDD"形式）
+        limiter (RateLimiter): API呼び出し間隔の制御（省略時は待機しない）
+        cache_dir (Path): キャッシュの保存先ディレクトリ（省略時はキャッシュしない）
+        
+    Returns:
+        pandas.DataFrame: 全銘柄の株価データフレーム（データがない日は空）
+        
+    Raises:
+        requests.exceptions.HTTPError: APIがエラーを返した場合（取引日でない場合は404）
+    """
+    cache_path = None
+    if cache_dir is not None:
+        cache_path = cache_dir / f"date_{date_str}.parquet"
+        if cache_path.exists():
+            return pd.read_parquet(cache_path)
+    
+    # V2 APIエンドポイント
+    base_url = "https://api.jquants.com/v2/equities/bars/daily"
+    
+    # ヘッダーにAPIキーを設定
+    headers = {
+        'X-API-Key': api_key
+    }
+    
+    # 日付指定で全銘柄のデータを取得（codeを指定しない）
+    params = {
+        'date': date_str
+    }
+    
+    records = []
+    while True:
+        if limiter is not None:
+            limiter.wait()
+        response = _SESSION.get(base_url, headers=headers, params=params, timeout=(3.05, 30))
+        response.raise_for_status()
+        
+        # V2 APIのレスポンス形式: {"data": [...], "pagination_key": "..."}
+        data = parse_json_response(response)
+        records.extend(data.get('data') or [])
+        pagination_key = data.get('pagination_key')
+        if not pagination_key:
+            break
+        params['pagination_key'] = pagination_key
+    
+    df = pd.DataFrame(records).rename(columns=V2_COLUMN_MAPPING)
+    
+    if cache_path is not None and not df.empty:
+        try:
+            df.to_parquet(cache_path, index=False)
+        except (OSError, ValueError, TypeError) as e:
+            # 保存できない列の型が含まれていた場合もキャッシュしないだけで処理は続ける
+            print(f"警告: 株価データのキャッシュ保存に失敗しました: {cache_path} - {e}", file=sys.stderr)
+    
+    return df
+
+
+def get_stock_prices_by_dates(api_key, codes, from_str, to_str, limiter: Optional[RateLimiter] = None,
+                              cache_dir: Optional[Path] = None, workers=8, max_errors=10, retries=2):
+    """
+    期間内の平日ごとに全銘柄の日足データを取得し、指定銘柄ごとのデータフレームに分ける
+    
+    銘柄ごとに期間を指定して取得する代わりに日付ごとに全銘柄を取得するため、
+    APIの呼び出し回数は銘柄数ではなく日数（約3ヶ月で65回程度）になる
+    取得に失敗した日付は再取得し、それでも取得できない日付が残った場合は例外を送出する
+    （1日でも欠けると全銘柄の前日比がその日をまたいで計算され、ストップ高の判定が誤るため）
+    
+    Args:
+        api_key (str): J-Quants APIキー
+        codes (List[str]): 対象の銘柄コード（4桁に正規化済み）
+        from_str (str): 開始日（"YYYYMMDD"形式、compute_date_rangeで計算）
+        to_str (str): 終了日（"YYYYMMDD"形式、compute_date_rangeで計算）
+        limiter (RateLimiter): API呼び出し間隔の制御（省略時は待機しない）
+        cache_dir (Path): キャッシュの保存先ディレクトリ（省略時はキャッシュしない、終了日の分は保存しない）
+        workers (int): 日付ごとの取得を並行して行うスレッド数
+        max_errors (int): 最初の取得で失敗した日付数がこの数に達した場合は、再取得せずに中止する
+        retries (int): 取得に失敗した日付を再取得する回数
+        
+    Returns:
+        dict: 銘柄コードから日付の昇順の株価データフレームへの辞書
+        
+    Raises:
+        Exception: 再取得しても取得できない日付が残った場合
+    """
+    # 期間内の平日を列挙（土日はAPIを呼び出さない。祝日は404となり読み飛ばす）
+    date_strs = pd.bdate_range(from_str, to_str).strftime('%Y%m%d').tolist()
+    
+    print(f"期間: {date_strs[0]} ～ {date_strs[-1]}（{len(date_strs)} 日分を日付ごとに取得）")
+    
+    frames_by_date = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        def fetch_dates(target_dates, stop_at=None):
+            """
+            指定した日付を並行して取得し、取得に失敗した日付のリストを返す
+            （stop_atを指定した場合は、失敗数が達した時点で未着手の取得を取り消す）
+            """
+            futures = [
+                # 終了日（当日）の日足はまだ確定していない場合があるためキャッシュしない
+                executor.submit(get_all_stocks_prices_by_date, api_key, date_str, limiter,
+                                cache_dir if date_str < to_str else None)
+                for date_str in target_dates
+            ]
+            failed = []
+            for i, (date_str, future) in enumerate(zip(target_dates, futures), 1):
+                try:
+                    df = future.result()
+                    print(f"[{i}/{len(target_dates)}] 日付 {date_str}: {len(df)} 件")
+                    if not df.empty:
+                        frames_by_date[date_str] = df
+                except requests.exceptions.HTTPError as e:
+                    if e.response is not None and e.response.status_code == 404:
+                        print(f"[{i}/{len(target_dates)}] 日付 {date_str}: 取引日ではない可能性があります")
+                        continue
+                    failed.append(date_str)
+                    print(f"[{i}/{len(target_dates)}] 日付 {date_str}: エラー: {e}")
+                except Exception as e:
+                    failed.append(date_str)
+                    print(f"[{i}/{len(target_dates)}] 日付 {date_str}: エラー: {e}")
+                
+                if stop_at is not None and len(failed) >= stop_at:
+                    for pending in futures[i:]:
+                        pending.cancel()
+                    break
+            return failed
+        
+        failed_dates = fetch_dates(date_strs, stop_at=max_errors)
+        if len(failed_dates) >= max_errors:
+            raise Exception(f"株価データの取得に失敗した日付が上限（{max_errors}）に達したため処理を中止します: {', '.join(failed_dates)}")
+        
+        # 取得に失敗した日付は、間隔を空けてから再取得する
+        for attempt in range(1, retries + 1):
+            if not failed_dates:
+                break
+            print(f"取得に失敗した {len(failed_dates)} 日分を再取得します（{attempt}/{retries} 回目）")
+            time.sleep(attempt)
+            failed_dates = fetch_dates(failed_dates)
+    
+    # 取得できない取引日が残った場合は、欠けた日をまたいで判定しないように中止する
+    if failed_dates:
+        raise Exception(f"株価データを取得できなかった日付があるため処理を中止します: {', '.join(failed_dates)}")
+    
+    # 日付の昇順に連結し、銘柄ごとに分けた後も日付順が保たれるようにする
+    frames = [frames_by_date[date_str] for date_str in date_strs if date_str in frames_by_date]
+    
+    if not frames:
+        return {}
+    
+    # 対象銘柄の行だけに絞ってから銘柄ごとに分ける
+    all_prices = pd.concat(frames, ignore_index=True)
+    if 'Code' not in all_prices.columns:
+        return {}
+    # 銘柄コードを対象銘柄をカテゴリとするカテゴリ型にし、対象外の銘柄（欠損値になる）を除く
+    # （以降のgroupbyは文字列ではなく整数のカテゴリコードで行われる）
+    all_prices['Code'] = pd.Categorical(normalize_code(all_prices['Code']), categories=pd.unique(pd.Series(codes)))
+    all_prices = all_prices[all_prices['Code'].notna()]
+    
+    # カテゴリ型のgroupbyは既定（observed=False）だとデータのないカテゴリも空のグループとして作られ、
+    # sort=Trueでグループの並べ替えも行われるため、どちらも指定して実際にある銘柄だけをそのままの順で分ける
+    prices_by_code = {
+        code: group.reset_index(drop=True)
+        for code, group in all_prices.groupby('Code', sort=False, observed=True)
+    }
+    return prices_by_code
+
+
 def get_all_stocks_latest_prices(api_key, max_days=7):
     """
     最新取引日の全銘柄株価を一括取得する
@@ -159,14 +457,6 @@ def get_all_stocks_latest_prices(api_key, max_days=7):
         tuple: (全銘柄の株価データフレーム, 取引日)
     """
     try:
-        # V2 APIエンドポイント
-        base_url = "https://api.jquants.com/v2/equities/bars/daily"
-        
-        # ヘッダーにAPIキーを設定
-        headers = {
-            'X-API-Key': api_key
-        }
-        
         # 最新日から順に取得し、データが取得できた時点で終了
         end_date = datetime.now()
         start_date = end_date - timedelta(days=max_days)
@@ -180,33 +470,12 @@ def get_all_stocks_latest_prices(api_key, max_days=7):
             print(f"  日付 {date_str} のデータを取得中...")
             
             try:
-                # 日付指定で全銘柄のデータを取得（codeを指定しない）
-                params = {
-                    'date': date_str
-                }
-                
-                response = requests.get(base_url, headers=headers, params=params)
-                response.raise_for_status()
-                
-                data = response.json()
+                df = get_all_stocks_prices_by_date(api_key, date_str)
                 
-                if 'data' in data and data['data']:
-                    df = pd.DataFrame(data['data'])
-                    
-                    if not df.empty:
-                        # V2 APIのカラム名をV1形式に変換
-                        column_mapping = {
-                            'H': 'High',
-                            'C': 'Close',
-                            'O': 'Open',
-                            'L': 'Low',
-                            'Vo': 'Volume'
-                        }
-                        df = df.rename(columns=column_mapping)
-                        
-                        print(f"    → {len(df)} 件のデータを取得")
-                        print(f"    → 最新日のデータを取得できたため、処理を終了します")
-                        return df, current_date
+                if not df.empty:
+                    print(f"    → {len(df)} 件のデータを取得")
+                    print(f"    → 最新日のデータを取得できたため、処理を終了します")
+                    return df, current_date
                 
             except requests.exceptions.HTTPError as e:
                 if e.response.status_code == 404:
@@ -228,6 +497,42 @@ def get_all_stocks_latest_prices(api_key, max_days=7):
         raise Exception(f"全銘柄データの取得中にエラーが発生しました: {e}")
 
 
+def normalize_code(codes):
+    """
+    銘柄コードを文字列に統一し、5桁で末尾が0のコードは4桁に正規化する
+    
+    Args:
+        codes (pandas.Series): 銘柄コードの列
+        
+    Returns:
+        numpy.ndarray: 正規化された銘柄コードの配列
+    """
+    code = codes.astype(str).str.zfill(5)
+    # 5桁の場合は末尾の0を削除して4桁に変換（行ごとの関数呼び出しを使わず一括で処理）
+    ends0 = (code.str.len() == 5) & code.str.endswith('0')
+    return np.where(ends0, code.str.slice(0, 4), code)
+
+
+def build_stock_records(df, company_names=None, markets=None):
+    """
+    株価データフレームから銘柄情報の辞書のリストを列単位でまとめて作成する
+    
+    Args:
+        df (pandas.DataFrame): Code, Close列を含むデータフレーム
+        company_names (list): dfの行と同じ順序の会社名（Noneの場合は空欄）
+        markets (list): dfの行と同じ順序の市場区分名（Noneの場合は空欄）
+        
+    Returns:
+        List[Dict]: 銘柄のリスト（code, company_name, market, latest_priceを含む）
+    """
+    return pd.DataFrame({
+        'code': df['Code'].to_numpy(),
+        'company_name': company_names if company_names is not None else '',
+        'market': markets if markets is not None else '',
+        'latest_price': df['Close'].to_numpy()
+    }, index=pd.RangeIndex(len(df))).to_dict('records')
+
+
 def filter_stocks_by_price(price_df, stock_list_df, min_price=100, max_price=600):
     """
     指定価格範囲の銘柄を抽出する
@@ -252,166 +557,76 @@ def filter_stocks_by_price(price_df, stock_list_df, min_price=100, max_price=600
     
     # 銘柄コード列を文字列に統一（5桁→4桁に正規化）
     if 'Code' in price_df.columns:
-        price_df['Code'] = price_df['Code'].astype(str).str.zfill(5)
-        # 5桁の場合は末尾の0を削除して4桁に変換
-        price_df['Code'] = price_df['Code'].apply(
-            lambda x: x[:-1] if len(x) == 5 and x.endswith('0') else x
-        )
+        # 正規化は1回だけ行い、以降のgroupbyが整数のカテゴリコードで行われるようにカテゴリ型にする
+        price_df['Code'] = pd.Categorical(normalize_code(price_df['Code']))
     
     # 各銘柄の最新日の終値を取得
     if 'Date' in price_df.columns:
         price_df['Date'] = pd.to_datetime(price_df['Date'])
-        price_df_sorted = price_df.sort_values(['Code', 'Date'], ascending=[True, False])
-        latest_prices = price_df_sorted.groupby('Code').first().reset_index()
+        if price_df['Date'].nunique() <= 1:
+            # 1日分のデータ（get_all_stocks_latest_pricesの結果）は銘柄ごとに1行のためそのまま使う
+            latest_prices = price_df
+        else:
+            # 銘柄ごとに日付が最大の行を選ぶ（ソートせずに各グループの最大位置だけを求める）
+            # （Codeはカテゴリ型のため、observed=Trueでデータのないカテゴリの空グループを作らない）
+            latest_idx = price_df.groupby('Code', sort=False, observed=True)['Date'].idxmax()
+            latest_prices = price_df.loc[latest_idx].reset_index(drop=True)
     else:
-        latest_prices = price_df.copy()
+        latest_prices = price_df
     
     # 指定価格範囲の銘柄を抽出
     if 'Close' in latest_prices.columns:
-        filtered_prices = latest_prices[
-            (latest_prices['Close'] >= min_price) & 
-            (latest_prices['Close'] <= max_price)
-        ].copy()
+        # NumPy配列で条件を判定して1回だけ行を選ぶ（以降は読み取りのみのためコピーしない）
+        close = latest_prices['Close'].to_numpy(dtype=np.float64)
+        filtered_prices = latest_prices.iloc[(close >= min_price) & (close <= max_price)]
     else:
         print("警告: Close列が見つかりません")
         return results
     
     print(f"  価格フィルタリング結果: {len(filtered_prices)} 件")
     
-    # 銘柄リストと結合して、会社名・市場情報を取得
+    # 銘柄リストから会社名・市場情報を取得
     if not stock_list_df.empty and 'Code' in stock_list_df.columns:
-        stock_list_df['Code'] = stock_list_df['Code'].astype(str).str.zfill(5)
-        stock_list_df['Code'] = stock_list_df['Code'].apply(
-            lambda x: x[:-1] if len(x) == 5 and x.endswith('0') else x
-        )
+        stock_list_df['Code'] = normalize_code(stock_list_df['Code'])
         
         # V2 APIのカラム名: CoName（会社名）、MktNm（市場区分名）
         company_name_col = 'CoName' if 'CoName' in stock_list_df.columns else None
         market_col = 'MktNm' if 'MktNm' in stock_list_df.columns else None
         
-        # 結合に使用するカラムを決定
-        merge_columns = ['Code']
-        if company_name_col:
-            merge_columns.append(company_name_col)
-        if market_col:
-            merge_columns.append(market_col)
-        
-        # 株価データと銘柄リストを結合
-        available_columns = [col for col in merge_columns if col in stock_list_df.columns]
-        if available_columns:
-            merged_df = filtered_prices.merge(
-                stock_list_df[available_columns],
-                on='Code',
-                how='left'
-            )
-            
-            for _, row in merged_df.iterrows():
-                results.append({
-                    'code': row['Code'],
-                    'company_name': row.get(company_name_col, '') if company_name_col else '',
-                    'market': row.get(market_col, '') if market_col else '',
-                    'latest_price': row.get('Close', None)
-                })
-        else:
-            # 結合できない場合はコードのみ
-            for _, row in filtered_prices.iterrows():
-                results.append({
-                    'code': row['Code'],
-                    'company_name': '',
-                    'market': '',
-                    'latest_price': row.get('Close', None)
-                })
+        # 銘柄コードから会社名・市場への辞書を作り、価格条件を満たした銘柄だけを引く
+        # （全銘柄との結合は行わない）
+        list_codes = stock_list_df['Code'].to_numpy()
+        name_map = dict(zip(list_codes, stock_list_df[company_name_col].to_numpy())) if company_name_col else {}
+        market_map = dict(zip(list_codes, stock_list_df[market_col].to_numpy())) if market_col else {}
+        
+        codes = filtered_prices['Code'].to_numpy()
+        results = build_stock_records(
+            filtered_prices,
+            company_names=[name_map.get(code, '') for code in codes],
+            markets=[market_map.get(code, '') for code in codes]
+        )
     else:
         # 銘柄リストがない場合はコードのみ
-        for _, row in filtered_prices.iterrows():
-            results.append({
-                'code': row['Code'],
-                'company_name': '',
-                'market': '',
-                'latest_price': row.get('Close', None)
-            })
+        results = build_stock_records(filtered_prices)
     
     return results
 
 
-def get_stock_price_three_months(api_key, code, months=3):
+def empty_stop_high_result():
     """
-    J-Quants API V2から指定された銘柄の過去3ヶ月の株価データを取得する
+    ストップ高が検出されなかった場合の検出結果を返す
     
-    Args:
-        api_key (str): J-Quants APIキー
-        code (str): 銘柄コード
-        months (int): 取得する月数（デフォルト: 3）
-        
     Returns:
-        pandas.DataFrame: 株価データのデータフレーム（Date, High, Close列を含む）
+        dict: 回数0の検出結果
     """
-    try:
-        # 過去Nヶ月の日付範囲を設定
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=months * 30)  # 約Nヶ月前
-        
-        end_date_str = end_date.strftime('%Y%m%d')
-        start_date_str = start_date.strftime('%Y%m%d')
-        
-        # V2 APIエンドポイント
-        base_url = "https://api.jquants.com/v2/equities/bars/daily"
-        
-        # ヘッダーにAPIキーを設定
-        headers = {
-            'X-API-Key': api_key
-        }
-        
-        # パラメータ
-        params = {
-            'code': code,
-            'from': start_date_str,
-            'to': end_date_str
-        }
-        
-        # APIリクエスト
-        response = requests.get(base_url, headers=headers, params=params)
-        response.raise_for_status()
-        
-        # レスポンスをJSONとして取得
-        data = response.json()
-        
-        # V2 APIのレスポンス形式: {"data": [...], "pagination_key": "..."}
-        if 'data' not in data or not data['data']:
-            return pd.DataFrame()
-        
-        # データフレームに変換
-        df = pd.DataFrame(data['data'])
-        
-        if df.empty:
-            return df
-        
-        # V2 APIのカラム名をV1形式に変換（互換性のため）
-        column_mapping = {
-            'H': 'High',
-            'C': 'Close',
-            'O': 'Open',
-            'L': 'Low',
-            'Vo': 'Volume'
-        }
-        
-        # カラム名を変換
-        df = df.rename(columns=column_mapping)
-        
-        # 日付でソート（古い順にソート、ストップ高判定のため）
-        if 'Date' in df.columns:
-            df['Date'] = pd.to_datetime(df['Date'])
-            df = df.sort_values('Date', ascending=True).reset_index(drop=True)
-        
-        return df
-        
-    except requests.exceptions.HTTPError as e:
-        # 404エラーなどは空のDataFrameを返す
-        if e.response.status_code == 404:
-            return pd.DataFrame()
-        raise Exception(f"株価データの取得中にエラーが発生しました: {e.response.status_code}")
-    except Exception as e:
-        raise Exception(f"株価データの取得中にエラーが発生しました: {e}")
+    return {
+        'count': 0,
+        'latest_date': None,
+        'latest_price': None,
+        'prev_day_stop_high': False,
+        'closed_at_stop_high': False,
+        'opening_stop_high': False
+    }
 
 
 def detect_stop_high(df, threshold_rate=0.13):
@@ -428,87 +643,54 @@ def detect_stop_high(df, threshold_rate=0.13):
         dict: ストップ高検出結果（回数、最新日、最新価格、追加判定項目など）
     """
     if df.empty or 'High' not in df.columns or 'Close' not in df.columns:
-        return {
-            'count': 0,
-            'latest_date': None,
-            'latest_price': None,
-            'prev_day_stop_high': False,
-            'closed_at_stop_high': False,
-            'opening_stop_high': False
-        }
+        return empty_stop_high_result()
     
     # 必要な列が存在するか確認
     required_columns = ['Date', 'High', 'Close']
     missing_columns = [col for col in required_columns if col not in df.columns]
     if missing_columns:
-        return {
-            'count': 0,
-            'latest_date': None,
-            'latest_price': None,
-            'prev_day_stop_high': False,
-            'closed_at_stop_high': False,
-            'opening_stop_high': False
-        }
-    
-    # 前日の終値を計算（shift(1)で1行ずらす）
-    df = df.copy()
-    df['前日終値'] = df['Close'].shift(1)
+        return empty_stop_high_result()
     
-    # 前日比上昇率を計算: (当日高値 - 前日終値) / 前日終値
-    df['前日比上昇率'] = (df['High'] - df['前日終値']) / df['前日終値']
+    # 前日終値と前日比上昇率をNumPy配列で計算（入力DataFrameのコピーや列の追加は行わない）
+    high = df['High'].to_numpy(dtype=np.float64)
+    close = df['Close'].to_numpy(dtype=np.float64)
+    prev_close = close[:-1]
     
-    # 終値の前日比上昇率も計算（ストップ高で終わったかの判定用）
-    df['終値前日比上昇率'] = (df['Close'] - df['前日終値']) / df['前日終値']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # 前日比上昇率を計算: (当日高値 - 前日終値) / 前日終値（2日目以降）
+        daily_rate = (high[1:] - prev_close) / prev_close
+        # 終値の前日比上昇率も計算（ストップ高で終わったかの判定用）
+        close_rate = (close[1:] - prev_close) / prev_close
     
     # ストップ高の判定: 前日比上昇率 >= 閾値
-    df['ストップ高'] = df['前日比上昇率'] >= threshold_rate
-    
-    # ストップ高をつけた日を抽出
-    stop_high_df = df[df['ストップ高'] == True].copy()
-    
-    if stop_high_df.empty:
-        return {
-            'count': 0,
-            'latest_date': None,
-            'latest_price': None,
-            'prev_day_stop_high': False,
-            'closed_at_stop_high': False,
-            'opening_stop_high': False
-        }
+    mask = daily_rate >= threshold_rate
+    hit_positions = np.flatnonzero(mask)
     
-    # 最新のストップ高日を取得
-    latest_stop_high = stop_high_df.iloc[-1]
-    latest_date = latest_stop_high['Date']
-    latest_price = latest_stop_high.get('High', None)
+    if hit_positions.size == 0:
+        return empty_stop_high_result()
     
-    # 元のデータフレームでのインデックスを取得
-    latest_date_str = latest_date.strftime('%Y-%m-%d') if hasattr(latest_date, 'strftime') else str(latest_date)
-    latest_idx_in_df = df[df['Date'] == latest_date].index
-    if len(latest_idx_in_df) > 0:
-        latest_idx = latest_idx_in_df[0]
-    else:
-        latest_idx = None
+    # 最新のストップ高日の位置（daily_rateは2日目から始まるため、元のデータでは+1した位置）
+    last_hit = int(hit_positions[-1])
+    latest_pos = last_hit + 1
+    latest_date = df['Date'].iat[latest_pos]
+    latest_price = df['High'].iat[latest_pos]
     
     # 直前の取引日もストップ高だったか
-    prev_day_stop_high = False
-    if latest_idx is not None and latest_idx > 0:
-        prev_row = df.iloc[latest_idx - 1]
-        prev_day_stop_high = prev_row.get('ストップ高', False)
+    prev_day_stop_high = last_hit > 0 and bool(mask[last_hit - 1])
     
     # ストップ高で終わったか（終値が前日比13%以上上昇している）
-    closed_at_stop_high = latest_stop_high.get('終値前日比上昇率', 0) >= threshold_rate
+    closed_at_stop_high = bool(close_rate[last_hit] >= threshold_rate)
     
     # 寄り付きストップ高（始値=終値 かつ ストップ高）
     opening_stop_high = False
     if 'Open' in df.columns:
-        latest_open = latest_stop_high.get('Open', None)
-        latest_close = latest_stop_high.get('Close', None)
-        if latest_open is not None and latest_close is not None:
-            # 始値と終値が一致（または非常に近い）かつストップ高
-            opening_stop_high = abs(latest_open - latest_close) < 0.01 and latest_stop_high.get('ストップ高', False)
+        # 始値は最新のストップ高日の値だけを参照する（列全体は変換しない）
+        latest_open = df['Open'].iat[latest_pos]
+        # 始値と終値が一致（または非常に近い）
+        opening_stop_high = bool(pd.notna(latest_open) and abs(float(latest_open) - close[latest_pos]) < 0.01)
     
     return {
-        'count': len(stop_high_df),
+        'count': int(hit_positions.size),
         'latest_date': latest_date,
         'latest_price': latest_price,
         'prev_day_stop_high': prev_day_stop_high,
@@ -517,6 +699,112 @@ def detect_stop_high(df, threshold_rate=0.13):
     }
 
 
+# cache=Trueでコンパイル結果を__pycache__に保存し、2回目以降の実行でJITコンパイルを省略する
+# （パディングにNaNを使うためfastmathは指定せず、前日終値が0の場合に例外ではなくinf/NaNとするため
+#   error_model='numpy'を指定する）
+@njit(parallel=True, cache=True, error_model='numpy')
+def stop_high_batch_kernel(high: np.ndarray, close: np.ndarray, open_: np.ndarray,
+                           lengths: np.ndarray, threshold_rate: float):
+    """
+    銘柄×日付の2次元配列から、銘柄ごとに並列でストップ高を判定
+    
+    Args:
+        high: 高値（各行が1銘柄、日付の昇順で左詰め、余りはNaN）
+        close: 終値（highと同じ形状）
+        open_: 始値（highと同じ形状、始値がない銘柄はNaN）
+        lengths: 各銘柄のデータ日数
+        threshold_rate: ストップ高判定の閾値
+        
+    Returns:
+        tuple: 銘柄ごとの (ストップ高回数, 最新ストップ高日の位置（なければ-1）,
+               直前取引日もストップ高, ストップ高で終了, 寄り付きストップ高) の配列
+    """
+    n_stocks = high.shape[0]
+    count = np.zeros(n_stocks, dtype=np.int64)
+    last_pos = np.full(n_stocks, -1, dtype=np.int64)
+    prev_day = np.zeros(n_stocks, dtype=np.bool_)
+    closed = np.zeros(n_stocks, dtype=np.bool_)
+    opening = np.zeros(n_stocks, dtype=np.bool_)
+    
+    for s in prange(n_stocks):
+        prev_hit = False
+        for j in range(1, lengths[s]):
+            prev_close = close[s, j - 1]
+            hit = (high[s, j] - prev_close) / prev_close >= threshold_rate
+            if hit:
+                count[s] += 1
+                last_pos[s] = j
+                prev_day[s] = prev_hit
+                closed[s] = (close[s, j] - prev_close) / prev_close >= threshold_rate
+                opening[s] = abs(open_[s, j] - close[s, j]) < 0.01
+            prev_hit = hit
+    
+    return count, last_pos, prev_day, closed, opening
+
+
+def detect_stop_high_batch(dfs: List[pd.DataFrame], threshold_rate=0.13) -> List[Dict]:
+    """
+    複数銘柄の株価データからストップ高をまとめて検出する
+    
+    numbaが利用可能な場合は全銘柄を2次元配列にまとめて1回のカーネル呼び出しで判定し、
+    利用できない場合は銘柄ごとにdetect_stop_highで判定する
+    
+    Args:
+        dfs (List[pandas.DataFrame]): 銘柄ごとの日次株価データ（日付の昇順）
+        threshold_rate (float): ストップ高判定の閾値（デフォルト: 0.13 = 13%）
+        
+    Returns:
+        List[Dict]: dfsと同じ順序のストップ高検出結果（detect_stop_highと同じ形式）
+    """
+    if not NUMBA_AVAILABLE:
+        return [detect_stop_high(df, threshold_rate=threshold_rate) for df in dfs]
+    
+    # 必要な列がない銘柄は個別の判定に任せる（回数0の結果になる）
+    required_columns = ['Date', 'High', 'Close']
+    results: List[Optional[Dict]] = [None] * len(dfs)
+    batch_positions = []
+    for i, df in enumerate(dfs):
+        if not df.empty and all(col in df.columns for col in required_columns):
+            batch_positions.append(i)
+        else:
+            results[i] = detect_stop_high(df, threshold_rate=threshold_rate)
+    if not batch_positions:
+        return results
+    
+    # 各銘柄のデータを左詰めで2次元配列に並べる（日数が足りない部分はNaN）
+    lengths = np.array([len(dfs[i]) for i in batch_positions], dtype=np.int64)
+    shape = (len(batch_positions), int(lengths.max()))
+    high = np.full(shape, np.nan)
+    close = np.full(shape, np.nan)
+    open_ = np.full(shape, np.nan)
+    for row, i in enumerate(batch_positions):
+        df = dfs[i]
+        n_days = lengths[row]
+        high[row, :n_days] = df['High'].to_numpy(dtype=np.float64)
+        close[row, :n_days] = df['Close'].to_numpy(dtype=np.float64)
+        if 'Open' in df.columns:
+            open_[row, :n_days] = df['Open'].to_numpy(dtype=np.float64)
+    
+    count, last_pos, prev_day, closed, opening = stop_high_batch_kernel(high, close, open_, lengths, threshold_rate)
+    
+    for row, i in enumerate(batch_positions):
+        if count[row] == 0:
+            results[i] = empty_stop_high_result()
+            continue
+        df = dfs[i]
+        pos = int(last_pos[row])
+        results[i] = {
+            'count': int(count[row]),
+            'latest_date': df['Date'].iat[pos],
+            'latest_price': df['High'].iat[pos],
+            'prev_day_stop_high': bool(prev_day[row]),
+            'closed_at_stop_high': bool(closed[row]),
+            'opening_stop_high': bool(opening[row])
+        }
+    
+    return results
+
+
 def save_results_to_csv(results: List[Dict], output_path: Path):
     """
     結果をCSVファイルに保存する
@@ -554,7 +842,28 @@ def save_results_to_csv(results: List[Dict], output_path: Path):
     df = df[available_columns]
     
     # CSVファイルに保存（既存ファイルは上書き、ダブルクオートで囲む）
-    df.to_csv(output_path, index=False, encoding='utf-8-sig', quoting=1)
+    if PYARROW_CSV_QUOTING_HEADER:
+        # pyarrowのCSVライターで書き出し（ヘッダーも含めて値をすべてクォートする）
+        # pyarrowは300.0を"300"、欠損値をクォートなしの空欄と書き出すため、全列をpandasのto_csvと同じ表記
+        # （floatは"300.0"、欠損値は""）の文字列にして渡す
+        formatted = {}
+        for col in df.columns:
+            missing = df[col].isna().to_numpy()
+            if pd.api.types.is_float_dtype(df[col]):
+                text = df[col].to_numpy(dtype=np.float64).astype(str)
+            else:
+                text = df[col].astype(str).to_numpy(dtype=object)
+            formatted[col] = np.where(missing, '', text)
+        table = pa.Table.from_pandas(pd.DataFrame(formatted, columns=df.columns), preserve_index=False)
+        with open(output_path, 'wb') as f:
+            f.write(b'\xef\xbb\xbf')  # utf-8-sigと同じBOMを付与
+            pacsv.write_csv(table, f, write_options=pacsv.WriteOptions(
+                include_header=True,
+                quoting_style='all_valid',
+                quoting_header='all_valid'
+            ))
+    else:
+        df.to_csv(output_path, index=False, encoding='utf-8-sig', quoting=1)
     
     print(f"\n結果をCSVファイルに保存しました: {output_path}")
     print(f"保存した件数: {len(df)} 件")
@@ -588,11 +897,18 @@ def main():
         help='API呼び出し間隔（秒）（デフォルト: 0.6）'
     )
     
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=8,
+        help='株価データを並行して取得するスレッド数（デフォルト: 8）'
+    )
+    
     parser.add_argument(
         '--max-errors',
         type=int,
         default=10,
-        help='最大エラー許容数（デフォルト: 10）'
+        help='株価データの取得に失敗した日付数の上限。達した場合は再取得せずに中止する（デフォルト: 10）'
     )
     
     parser.add_argument(
@@ -602,6 +918,12 @@ def main():
         help='出力CSVファイルパス（デフォルト: 自動生成）'
     )
     
+    parser.add_argument(
+        '--cache',
+        action='store_true',
+        help='取得した過去日の株価データを data/cache/daily_bars にParquetで保存し、再実行時の取得を省く（pyarrowが必要）'
+    )
+    
     parser.add_argument(
         '--max-stocks',
         type=int,
@@ -621,7 +943,8 @@ def main():
         print("=" * 80)
         print(f"価格範囲: {args.min_price:,.0f}円 〜 {args.max_price:,.0f}円")
         print(f"API呼び出し間隔: {args.delay}秒")
-        print(f"最大エラー許容数: {args.max_errors}")
+        print(f"並行取得スレッド数: {args.workers}")
+        print(f"取得失敗日数の上限: {args.max_errors}")
         if args.max_stocks:
             print(f"テストモード: 最大処理銘柄数 {args.max_stocks} 件")
         print("=" * 80)
@@ -673,66 +996,70 @@ def main():
         print(f"処理対象銘柄数: {len(filtered_stocks)} 件")
         print("-" * 80)
         
-        results = []
-        error_count = 0
         start_time = datetime.now()
         
-        for i, stock_info in enumerate(filtered_stocks, 1):
+        # 株価データは日付ごとに全銘柄をまとめて取得し、呼び出し間隔はRateLimiterで制御する
+        limiter = RateLimiter(args.delay)
+        
+        # キャッシュの保存先（--cache指定時のみ）
+        cache_dir = None
+        if args.cache:
+            if PYARROW_AVAILABLE:
+                cache_dir = project_root / "data" / "cache" / "daily_bars"
+                cache_dir.mkdir(parents=True, exist_ok=True)
+            else:
+                print("警告: pyarrowがインストールされていないため、キャッシュは使用しません")
+        
+        # 取得期間は全日付で共通のため1回だけ計算する
+        from_str, to_str = compute_date_range(months=3)
+        # 取得できない取引日が残った場合は例外となり、欠けたデータでは判定せずに終了する
+        prices_by_code = get_stock_prices_by_dates(
+            api_key,
+            [stock_info['code'] for stock_info in filtered_stocks],
+            from_str,
+            to_str,
+            limiter=limiter,
+            cache_dir=cache_dir,
+            workers=args.workers,
+            max_errors=args.max_errors
+        )
+        
+        # 銘柄リストの順に、データが取得できた銘柄だけを判定対象にする
+        fetched = [
+            (stock_info, prices_by_code[stock_info['code']])
+            for stock_info in filtered_stocks
+            if stock_info['code'] in prices_by_code
+        ]
+        print(f"株価データ取得銘柄数: {len(fetched)} 件（データなし: {len(filtered_stocks) - len(fetched)} 件）")
+        
+        # 取得した全銘柄のストップ高をまとめて判定
+        print(f"\nストップ高を判定中... ({len(fetched)} 銘柄)")
+        stop_high_results = detect_stop_high_batch([df for _, df in fetched], threshold_rate=0.13)
+        
+        # 結果の件数は判定した銘柄数以下のため、先に確保して該当位置に代入する
+        results = [None] * len(fetched)
+        for i, ((stock_info, df), stop_high_result) in enumerate(zip(fetched, stop_high_results)):
+            if stop_high_result['count'] == 0:
+                continue
+            
             code = stock_info['code']
-            print(f"[{i}/{len(filtered_stocks)}] 処理中: {code} ({stock_info.get('company_name', '')})")
+            # 最新終値を取得（取得できた銘柄のデータは空でなく、Close列の存在も判定時に確認済み）
+            latest_close = df['Close'].iat[-1]
             
-            try:
-                # 過去3ヶ月の株価データを取得
-                df = get_stock_price_three_months(api_key, code, months=3)
-                
-                if df.empty:
-                    print(f"  → データなし")
-                    continue
-                
-                # ストップ高を検出
-                stop_high_result = detect_stop_high(df, threshold_rate=0.13)
-                
-                if stop_high_result['count'] > 0:
-                    # 最新終値を取得
-                    latest_close = df.iloc[-1].get('Close', None) if not df.empty else None
-                    
-                    results.append({
-                        '銘柄コード': code,
-                        '銘柄名': stock_info.get('company_name', ''),
-                        '市場': stock_info.get('market', ''),
-                        'ストップ高回数': stop_high_result['count'],
-                        '最新ストップ高日': stop_high_result['latest_date'].strftime('%Y-%m-%d') if stop_high_result['latest_date'] else '',
-                        '最新ストップ高価格': stop_high_result['latest_price'],
-                        '最新終値': latest_close,
-                        '直前取引日もストップ高': '○' if stop_high_result.get('prev_day_stop_high', False) else '×',
-                        'ストップ高で終了': '○' if stop_high_result.get('closed_at_stop_high', False) else '×',
-                        '寄り付きストップ高': '○' if stop_high_result.get('opening_stop_high', False) else '×'
-                    })
-                    print(f"  → ストップ高検出: {stop_high_result['count']} 回")
-                else:
-                    print(f"  → ストップ高なし")
-                
-                # 進捗表示（10件ごと）
-                if i % 10 == 0:
-                    elapsed_time = datetime.now() - start_time
-                    print(f"  進捗: {i}/{len(filtered_stocks)} 件完了 (経過時間: {elapsed_time})")
-                
-                # APIレート制限対策
-                if i < len(filtered_stocks):
-                    time.sleep(args.delay)
-                
-            except Exception as e:
-                error_count += 1
-                print(f"  → エラー: {e}")
-                
-                # エラー数が上限に達した場合は処理を停止
-                if error_count >= args.max_errors:
-                    print(f"エラー数が上限（{args.max_errors}）に達しました。処理を停止します。")
-                    break
-                
-                # エラー時も少し待機
-                if i < len(filtered_stocks):
-                    time.sleep(args.delay)
+            results[i] = {
+                '銘柄コード': code,
+                '銘柄名': stock_info['company_name'],
+                '市場': stock_info['market'],
+                'ストップ高回数': stop_high_result['count'],
+                '最新ストップ高日': stop_high_result['latest_date'] or '',
+                '最新ストップ高価格': stop_high_result['latest_price'],
+                '最新終値': latest_close,
+                '直前取引日もストップ高': '○' if stop_high_result['prev_day_stop_high'] else '×',
+                'ストップ高で終了': '○' if stop_high_result['closed_at_stop_high'] else '×',
+                '寄り付きストップ高': '○' if stop_high_result['opening_stop_high'] else '×'
+            }
+            print(f"  {code} ({stock_info['company_name']}): ストップ高検出 {stop_high_result['count']} 回")
+        results = [result for result in results if result is not None]
         
         # ステップ5: 結果をCSV出力
         if results:
@@ -759,7 +1086,6 @@ def main():
         print("=" * 80)
         print(f"処理対象銘柄数: {len(filtered_stocks)} 件")
         print(f"ストップ高検出銘柄数: {len(results)} 件")
-        print(f"エラー数: {error_count} 件")
         print(f"処理時間: {total_time}")
         print("=" * 80)
         
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+歩み値（tick_chart）CSVファイルの読み込みライブラリ
+
+test_31_create_one_minute_chart.py と analyze_tick_chart_strategy.py で使用する
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+import numpy as np
+
+# pyarrowはオプション（インストールされていればCSVのパースをマルチスレッドで行う）
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.compute as pc
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# ヘッダー（列名のタプル）ごとに特定済みの列名をキャッシュ
+_schema_cache: Dict[Tuple[str, ...], Tuple[Optional[str], Optional[str], Optional[str]]] = {}
+
+
+def read_tick_header(csv_path: Path) -> List[str]:
+    """
+    CSVファイルのヘッダー行のみをバイト列のまま読み込み、区切り文字で分割して列名を返す
+    
+    Args:
+        csv_path: CSVファイルのパス
+    
+    Returns:
+        list: ヘッダー行の列名リスト
+    """
+    with open(csv_path, 'rb') as f:
+        header_line = f.readline().decode('utf-8-sig').rstrip('\r\n')
+    return [col.strip('"') for col in header_line.split(',')]
+
+
+def resolve_tick_columns(header: List[str]) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """
+    ヘッダーから時間・約定値・出来高の列名を特定（同じヘッダーは2回目以降キャッシュを使用）
+    
+    Args:
+        header: ヘッダー行の列名リスト
+    
+    Returns:
+        tuple: (時間列, 約定値列, 出来高列)、見つからない列はNone
+    """
+    key = tuple(header)
+    if key in _schema_cache:
+        return _schema_cache[key]
+    
+    time_col = None
+    price_col = None
+    volume_col = None
+    
+    for col in header:
+        if '時間' in col:
+            time_col = col
+        elif '約定値' in col or '約定' in col:
+            price_col = col
+        elif '出来高' in col:
+            volume_col = col
+    
+    _schema_cache[key] = (time_col, price_col, volume_col)
+    return _schema_cache[key]
+
+
+def read_tick_columns(csv_path: Path, time_col: str, price_col: str, volume_col: str) -> pd.DataFrame:
+    """
+    CSVファイルから時間・約定値・出来高の3列のみを読み込む
+    
+    pyarrowが利用可能な場合はマルチスレッドのCSVリーダーを使用し、
+    利用できない場合はpandasのCエンジンで読み込む
+    3列とも文字列として読み込んでから数値に変換し、数値にできない値（"-"など）は
+    ファイル全体をエラーにせずNaNにする（呼び出し側でその行だけを除去する）
+    
+    Args:
+        csv_path: CSVファイルのパス
+        time_col: 時間列の列名
+        price_col: 約定値列の列名
+        volume_col: 出来高列の列名
+    
+    Returns:
+        pd.DataFrame: 時間列（文字列）、約定値列・出来高列（float64、変換できない値はNaN）
+    """
+    if PYARROW_AVAILABLE:
+        columns = [time_col, price_col, volume_col]
+        # ファイルをメモリマップして読み込む（並列処理時もOSのページキャッシュを共有し、ユーザー空間に二重にバッファしない）
+        with pa.memory_map(str(csv_path), 'r') as source:
+            table = pacsv.read_csv(
+                source,
+                parse_options=pacsv.ParseOptions(delimiter=','),
+                convert_options=pacsv.ConvertOptions(
+                    include_columns=columns,
+                    column_types={col: pa.string() for col in columns},
+                    null_values=[''],
+                    strings_can_be_null=True
+                )
+            )
+        
+        # 数値列はカンマと前後の空白を除去してから数値に変換
+        arrays = {time_col: table[time_col]}
+        for col in (price_col, volume_col):
+            arrays[col] = pc.utf8_trim_whitespace(pc.replace_substring(table[col], ',', ''))
+        df = pa.table(arrays).to_pandas()
+    else:
+        df = pd.read_csv(
+            csv_path,
+            usecols=[time_col, price_col, volume_col],
+            quotechar='"',
+            na_values=[''],
+            dtype=str,
+            encoding='utf-8-sig',
+            memory_map=True
+        )
+        for col in (price_col, volume_col):
+            df[col] = df[col].str.replace(',', '', regex=False).str.strip()
+    
+    for col in (price_col, volume_col):
+        df[col] = pd.to_numeric(df[col], errors='coerce').astype(np.float64)
+    return df